@@ -1,3 +1,10 @@
 from battleship.files import Files
 from battleship.player import Player
 from battleship.board import Board
+from battleship.bitboard import BitBoard
+from battleship.numpy_board import NumpyBoard
+from battleship.byte_board import ByteBoard
+from battleship.backends import make_board
+from battleship.fleet import Fleet, Ship
+from battleship.shots import ShotHistory
+from battleship.engine import GameEngine, ShotResult, PlacementError, ShotError
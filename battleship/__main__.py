@@ -0,0 +1,216 @@
+"""Command line tools for running battleship games without the interactive console
+
+    python -m battleship simulate standard_game.txt --strategy hunt --games 100000
+    python -m battleship replay games.log --game 3 --turn 20
+    python -m battleship rerun games.log --strategy density
+    python -m battleship serve standard_game.txt --port 8765
+    python -m battleship referee standard_game.txt "python my_bot.py" "python -m battleship bot --strategy hunt"
+    python -m battleship tournament standard_game.txt --strategies random hunt density --checkpoint tournament.jsonl
+    python -m battleship spectate battleship-game
+"""
+import argparse
+import asyncio
+import shlex
+import sys
+import time
+
+from battleship.backends import BACKENDS
+from battleship.config import ConfigError, load_config
+from battleship.gamelog import read_games, replay, replay_log, rerun_strategy
+from battleship.referee import Referee, run_bot
+from battleship.render import render_board
+from battleship.server import GameServer
+from battleship.shared_state import SharedGameReader
+from battleship.simulate import simulate
+from battleship.strategies import STRATEGIES
+from battleship.tournament import CheckpointError, Tournament
+
+
+def run_simulate(args):
+    rows, columns, ship_dict = args.config
+    stats = simulate(rows, columns, ship_dict, args.strategy, args.games, args.workers, args.chunk_size, args.seed)
+    print(stats.report())
+
+
+def run_replay(args):
+    if args.game is None:
+        games, winners = replay_log(args.log)
+        print(f'replayed {games} games')
+        for winner, count in winners.items():
+            print(f'{winner if winner is not None else "unfinished"}: {count}')
+        return
+    games = 0
+    for record in read_games(args.log):
+        if games == args.game:
+            break
+        games += 1
+    else:
+        raise SystemExit(f'{args.log} has only {games} games')
+    engine = replay(record, args.turn)
+    print(f'game {args.game} after {len(engine.history)} of {len(record.shots)} shots')
+    for player in engine.players:
+        print(f'{player}\'s Placement Board')
+        print(render_board(engine.placement_board(player)), end='')
+    if engine.winner is not None:
+        print(f'{engine.winner} won!')
+
+
+def run_rerun(args):
+    print(rerun_strategy(args.log, args.strategy, args.seed).report())
+
+
+def run_serve(args):
+    rows, columns, ship_dict = args.config
+    server = GameServer(rows, columns, ship_dict, args.turn_timeout, args.backend)
+    print(f'serving {rows}x{columns} games on {args.host}:{args.port}')
+    try:
+        asyncio.run(server.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+def run_referee(args):
+    rows, columns, ship_dict = args.config
+    commands = [shlex.split(command) for command in args.bots]
+    referee = Referee(rows, columns, ship_dict, commands, args.move_timeout, args.workers)
+    print(referee.run(args.games).report())
+
+
+def run_tournament(args):
+    rows, columns, ship_dict = args.config
+    tournament = Tournament(rows, columns, ship_dict, args.strategies, args.games, args.seed, args.chunk_size,
+                            args.checkpoint)
+
+    def progress(finished, games):
+        print(f'\r{finished}/{games} games', end='', file=sys.stderr, flush=True)
+
+    try:
+        results = tournament.run(args.workers, progress)
+    except CheckpointError as error:
+        raise SystemExit(str(error)) from None
+    except KeyboardInterrupt:
+        print(file=sys.stderr)
+        if args.checkpoint:
+            raise SystemExit(f'stopped, run the same command again to carry on from {args.checkpoint}') from None
+        raise SystemExit('stopped') from None
+    print(file=sys.stderr)
+    print(results.report(args.bootstrap))
+
+
+def show_snapshot(snapshot, reveal):
+    if snapshot.history:
+        shooter, target, row, col = snapshot.history[-1]
+        print(f'{snapshot.players[shooter]} fired at {snapshot.players[target]}\'s {row} {col}')
+    for player in snapshot.players:
+        board = snapshot.placement_board(player) if reveal else snapshot.firing_board(player)
+        print(f'{player}\'s board, {snapshot.alive[player]} ships afloat')
+        print(render_board(board))
+    if snapshot.winner is not None:
+        print(f'{snapshot.winner} won after {snapshot.shots} shots')
+
+
+def run_spectate(args):
+    try:
+        reader = SharedGameReader(args.name)
+    except (FileNotFoundError, ValueError) as error:
+        raise SystemExit(f'cannot watch {args.name}: {error}') from None
+    seen = None
+    try:
+        while True:
+            snapshot = reader.snapshot()
+            if snapshot.sequence != seen:
+                seen = snapshot.sequence
+                show_snapshot(snapshot, args.reveal)
+                if snapshot.winner is not None:
+                    break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
+
+
+def run_bot_command(args):
+    run_bot(args.strategy, sys.stdin, sys.stdout, args.seed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='battleship')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    simulate_parser = commands.add_parser('simulate', help='play many games with random fleets and report statistics')
+    simulate_parser.add_argument('config', help='path to a game configuration file')
+    simulate_parser.add_argument('--strategy', choices=list(STRATEGIES), default='hunt')
+    simulate_parser.add_argument('--games', type=int, default=1000)
+    simulate_parser.add_argument('--workers', type=int, default=None, help='processes to use (default: one per CPU)')
+    simulate_parser.add_argument('--chunk-size', type=int, default=None, help='games per task sent to a worker')
+    simulate_parser.add_argument('--seed', type=int, default=None)
+    simulate_parser.set_defaults(handler=run_simulate)
+
+    replay_parser = commands.add_parser('replay', help='replay logged games, or show one of them at a given turn')
+    replay_parser.add_argument('log', help='path to a game log')
+    replay_parser.add_argument('--game', type=int, default=None, help='the number of the game to show, from 0')
+    replay_parser.add_argument('--turn', type=int, default=None, help='how many shots to replay (default: all)')
+    replay_parser.set_defaults(handler=run_replay)
+
+    rerun_parser = commands.add_parser('rerun', help='let a strategy fire at every fleet in a game log')
+    rerun_parser.add_argument('log', help='path to a game log')
+    rerun_parser.add_argument('--strategy', choices=list(STRATEGIES), default='hunt')
+    rerun_parser.add_argument('--seed', type=int, default=0)
+    rerun_parser.set_defaults(handler=run_rerun)
+
+    serve_parser = commands.add_parser('serve', help='host games for clients connecting over TCP')
+    serve_parser.add_argument('config', help='path to a game configuration file')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8765)
+    serve_parser.add_argument('--turn-timeout', type=float, default=60.0,
+                              help='seconds a player has to answer before losing the game (default: 60)')
+    serve_parser.add_argument('--backend', choices=list(BACKENDS), default='bytearray',
+                              help='how boards store their cells (default: bytearray)')
+    serve_parser.set_defaults(handler=run_serve)
+
+    referee_parser = commands.add_parser('referee', help='play two bot programs against each other over JSON lines')
+    referee_parser.add_argument('config', help='path to a game configuration file')
+    referee_parser.add_argument('bots', nargs=2, metavar='BOT', help='the command that starts a bot, in quotes')
+    referee_parser.add_argument('--games', type=int, default=100)
+    referee_parser.add_argument('--workers', type=int, default=1, help='games played at once, each by its own pair '
+                                                                      'of bot processes (default: 1)')
+    referee_parser.add_argument('--move-timeout', type=float, default=1.0,
+                                help='seconds a bot has to answer before losing the game (default: 1)')
+    referee_parser.set_defaults(handler=run_referee)
+
+    tournament_parser = commands.add_parser('tournament', help='rate strategies by playing every pairing of them')
+    tournament_parser.add_argument('config', help='path to a game configuration file')
+    tournament_parser.add_argument('--strategies', nargs='+', choices=list(STRATEGIES), default=list(STRATEGIES))
+    tournament_parser.add_argument('--games', type=int, default=1000, help='games every pairing plays (default: 1000)')
+    tournament_parser.add_argument('--workers', type=int, default=None, help='processes to use (default: one per CPU)')
+    tournament_parser.add_argument('--chunk-size', type=int, default=None, help='games per task sent to a worker')
+    tournament_parser.add_argument('--seed', type=int, default=None)
+    tournament_parser.add_argument('--checkpoint', default=None, metavar='FILE',
+                                   help='save progress to this file, and carry on from it if it exists')
+    tournament_parser.add_argument('--bootstrap', type=int, default=200,
+                                   help='resamples for the rating confidence intervals (default: 200)')
+    tournament_parser.set_defaults(handler=run_tournament)
+
+    spectate_parser = commands.add_parser('spectate', help='watch a game shared with python main.py --share')
+    spectate_parser.add_argument('name', help='the name the game is shared under')
+    spectate_parser.add_argument('--reveal', action='store_true', help='show where the ships are as well as the shots')
+    spectate_parser.add_argument('--interval', type=float, default=0.2, help='seconds between looks at the game')
+    spectate_parser.set_defaults(handler=run_spectate)
+
+    bot_parser = commands.add_parser('bot', help='play as a referee bot over stdin and stdout with a built-in strategy')
+    bot_parser.add_argument('--strategy', choices=list(STRATEGIES), default='hunt')
+    bot_parser.add_argument('--seed', type=int, default=None)
+    bot_parser.set_defaults(handler=run_bot_command)
+
+    args = parser.parse_args(argv)
+    if hasattr(args, 'config'):
+        try:
+            args.config = load_config(args.config)
+        except (OSError, ConfigError) as error:
+            parser.error(f'{args.config}: {error}')
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    main()
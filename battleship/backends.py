@@ -0,0 +1,61 @@
+from battleship.board import Board
+from battleship.bitboard import BitBoard
+from battleship.byte_board import ByteBoard
+from battleship.numpy_board import NumpyBoard
+from battleship.placement import FreeRunIndex, OccupiedCells
+from battleship.shots import ShotHistory, SparseShotHistory
+from battleship.sparse_board import SparseBoard
+
+BACKENDS = {
+    'list': Board,
+    'bitboard': BitBoard,
+    'numpy': NumpyBoard,
+    'bytearray': ByteBoard,
+    'sparse': SparseBoard,
+}
+
+# backends whose memory has to grow with what is on the board rather than with its size
+SPARSE_BACKENDS = {'sparse'}
+
+# boards with more cells than this check placements against the cells ships cover instead of keeping a FreeRunIndex,
+# whose two runs per cell would take eight bytes a cell for every player
+DENSE_INDEX_CELLS = 1 << 18
+
+
+def make_board(rows, columns, backend='list'):
+    """Creates an empty board with the requested storage backend
+        Parameters:
+            rows (int): the number of rows of the board
+            columns (int): the number of columns of the board
+            backend (str): one of the names in BACKENDS
+        Returns:
+            board: the created board
+    """
+    try:
+        board_class = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f'unknown board backend {backend!r}, expected one of {", ".join(BACKENDS)}') from None
+    return board_class(rows, columns)
+
+
+def make_free_index(rows, columns, backend='list'):
+    """Creates the index of free cells for placing ships: a FreeRunIndex, or an OccupiedCells for sparse backends
+    and boards of more than DENSE_INDEX_CELLS cells"""
+    if backend in SPARSE_BACKENDS or rows * columns > DENSE_INDEX_CELLS:
+        return OccupiedCells(rows, columns)
+    return FreeRunIndex(rows, columns)
+
+
+def make_cell_indexes(rows, columns, backend='list'):
+    """Creates the index of free cells for placing ships and the history of shots that go with a backend's boards
+        Parameters:
+            rows (int): the number of rows of the board
+            columns (int): the number of columns of the board
+            backend (str): one of the names in BACKENDS
+        Returns:
+            free (FreeRunIndex): where ships still fit, see make_free_index
+            shots (ShotHistory): the cells fired at, a SparseShotHistory for sparse backends
+    """
+    if backend in SPARSE_BACKENDS:
+        return make_free_index(rows, columns, backend), SparseShotHistory(rows, columns)
+    return make_free_index(rows, columns, backend), ShotHistory(rows, columns)
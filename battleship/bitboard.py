@@ -0,0 +1,117 @@
+class BitRow:
+    def __init__(self, board, row):
+        self.board = board
+        self.row = row
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[col] for col in range(*index.indices(self.board.columns))]
+        if index < 0:
+            index += self.board.columns
+        if not 0 <= index < self.board.columns:
+            raise IndexError('column index out of range')
+        return self.board.cell(self.row, index)
+
+    def __setitem__(self, index, value):
+        if index < 0:
+            index += self.board.columns
+        if not 0 <= index < self.board.columns:
+            raise IndexError('column index out of range')
+        self.board.set_cell(self.row, index, value)
+
+    def __len__(self):
+        return self.board.columns
+
+    def __iter__(self):
+        for col in range(self.board.columns):
+            yield self.board.cell(self.row, col)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class BitBoard:
+    """A battleship board stored as integer bitmasks instead of a nested list
+
+    Every row has one bitmask of its hits and one of its misses, bit col standing for column col, and the ship letters
+    are kept in a dict by cell index row * columns + col. An empty board is two lists of zeros and copying one copies
+    those lists and the ship cells, while reading or writing a cell only touches the masks of its own row. Indexing
+    with board[row][col] still reads and writes single characters like Board does.
+    """
+    def __init__(self, rows, columns):
+        self.rows = rows
+        self.columns = columns
+        self.clear_board()
+
+    def cell(self, row, col):
+        bit = 1 << col
+        if self.hits[row] & bit:
+            return 'X'
+        if self.misses[row] & bit:
+            return 'O'
+        return self.letters.get(row * self.columns + col, '*')
+
+    def set_cell(self, row, col, value):
+        bit = 1 << col
+        if value == 'X':
+            self.hits[row] |= bit
+            self.misses[row] &= ~bit
+        elif value == 'O':
+            self.misses[row] |= bit
+            self.hits[row] &= ~bit
+        else:
+            self.hits[row] &= ~bit
+            self.misses[row] &= ~bit
+            if value == '*':
+                self.letters.pop(row * self.columns + col, None)
+            else:
+                self.letters[row * self.columns + col] = value
+
+    def copy(self):
+        board = BitBoard.__new__(BitBoard)
+        board.rows = self.rows
+        board.columns = self.columns
+        board.letters = dict(self.letters)
+        board.hits = list(self.hits)
+        board.misses = list(self.misses)
+        board.undo_stack = []
+        return board
+
+    def apply_shot(self, row, col, hit):
+        """Marks a cell hit or missed, remembering the row's hit and miss masks so undo_shot can put them back"""
+        bit = 1 << col
+        self.undo_stack.append((row, self.hits[row], self.misses[row]))
+        if hit:
+            self.hits[row] |= bit
+            self.misses[row] &= ~bit
+        else:
+            self.misses[row] |= bit
+            self.hits[row] &= ~bit
+
+    def undo_shot(self):
+        row, self.hits[row], self.misses[row] = self.undo_stack.pop()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [BitRow(self, row) for row in range(*index.indices(self.rows))]
+        if index < 0:
+            index += self.rows
+        if not 0 <= index < self.rows:
+            raise IndexError('row index out of range')
+        return BitRow(self, index)
+
+    def __len__(self):
+        return self.rows
+
+    def __iter__(self):
+        for row in range(self.rows):
+            yield BitRow(self, row)
+
+    def __repr__(self):
+        return '\n'.join([' '.join(row) for row in self])
+
+    def clear_board(self):
+        self.letters = {}
+        self.hits = [0] * self.rows
+        self.misses = [0] * self.rows
+        self.undo_stack = []
@@ -3,6 +3,7 @@ class Board:
         self.rows = rows
         self.columns = columns
         self.board = self._create_board(rows, columns)
+        self.undo_stack = []
 
     def _create_board(self, rows, columns):
         placement_board = []
@@ -26,5 +27,23 @@ class Board:
     def __repr__(self):
         return '\n'.join([' '.join(row) for row in self.board])
 
+    def copy(self):
+        board = Board.__new__(Board)
+        board.rows = self.rows
+        board.columns = self.columns
+        board.board = [row[:] for row in self.board]
+        board.undo_stack = []
+        return board
+
+    def apply_shot(self, row, col, hit):
+        """Marks a cell 'X' for a hit or 'O' for a miss, remembering what it was so undo_shot can put it back"""
+        self.undo_stack.append((row, col, self.board[row][col]))
+        self.board[row][col] = 'X' if hit else 'O'
+
+    def undo_shot(self):
+        row, col, cell = self.undo_stack.pop()
+        self.board[row][col] = cell
+
     def clear_board(self):
         self.board = self._create_board(self.rows, self.columns)
+        self.undo_stack = []
@@ -0,0 +1,119 @@
+from battleship.numpy_board import BASE_CELLS, HIT, MISS
+
+
+class ByteRow:
+    """One row of a ByteBoard, read and written through a memoryview of its part of the board's bytearray"""
+    __slots__ = ('board', 'cells')
+
+    def __init__(self, board, cells):
+        self.board = board
+        self.cells = cells
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            letters = self.board.letters
+            return [letters[code] for code in self.cells[index]]
+        return self.board.letters[self.cells[index]]
+
+    def __setitem__(self, index, value):
+        self.cells[index] = self.board.code(value)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __iter__(self):
+        letters = self.board.letters
+        return iter([letters[code] for code in self.cells])
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class ByteBoard:
+    """A battleship board stored as one flat bytearray, a byte per cell
+
+    Cells hold the same codes as NumpyBoard: 0 is empty, 1 a miss, 2 a hit and 3 onwards one code per ship letter, so
+    a board takes a byte per cell where Board takes an eight byte reference, and clearing it is one slice assignment.
+    Each row is a ByteRow over a memoryview of its slice of the bytearray, made once with the board, so
+    board[row][col] reads and writes the same single characters as Board without copying anything.
+    """
+    def __init__(self, rows, columns):
+        self.rows = rows
+        self.columns = columns
+        self.cells = bytearray(rows * columns)
+        self.letters = list(BASE_CELLS)
+        self.codes = {letter: code for code, letter in enumerate(BASE_CELLS)}
+        self.undo_stack = []
+        self._make_rows()
+
+    def _make_rows(self):
+        view = memoryview(self.cells)
+        columns = self.columns
+        self.row_views = [ByteRow(self, view[start:start + columns])
+                          for start in range(0, self.rows * columns, columns)]
+
+    def code(self, letter):
+        code = self.codes.get(letter)
+        if code is None:
+            code = len(self.letters)
+            if code > 255:
+                raise ValueError('a bytearray board holds at most 253 different ship letters')
+            self.letters.append(letter)
+            self.codes[letter] = code
+        return code
+
+    def cell(self, row, col):
+        return self.letters[self.cells[row * self.columns + col]]
+
+    def set_cell(self, row, col, value):
+        self.cells[row * self.columns + col] = self.code(value)
+
+    def copy(self):
+        board = ByteBoard.__new__(ByteBoard)
+        board.rows = self.rows
+        board.columns = self.columns
+        board.cells = bytearray(self.cells)
+        board.letters = list(self.letters)
+        board.codes = dict(self.codes)
+        board.undo_stack = []
+        board._make_rows()
+        return board
+
+    @classmethod
+    def from_cells(cls, rows, columns, cells, letters):
+        """Makes a board around existing cell codes, letters[code] being the letter each code stands for"""
+        board = cls.__new__(cls)
+        board.rows = rows
+        board.columns = columns
+        board.cells = bytearray(cells)
+        board.letters = list(letters)
+        board.codes = {letter: code for code, letter in enumerate(board.letters)}
+        board.undo_stack = []
+        board._make_rows()
+        return board
+
+    def apply_shot(self, row, col, hit):
+        """Marks a cell hit or missed, remembering its code so undo_shot can put it back"""
+        index = row * self.columns + col
+        self.undo_stack.append((index, self.cells[index]))
+        self.cells[index] = HIT if hit else MISS
+
+    def undo_shot(self):
+        index, code = self.undo_stack.pop()
+        self.cells[index] = code
+
+    def __getitem__(self, index):
+        return self.row_views[index]
+
+    def __len__(self):
+        return self.rows
+
+    def __iter__(self):
+        return iter(self.row_views)
+
+    def __repr__(self):
+        return '\n'.join([' '.join(row) for row in self])
+
+    def clear_board(self):
+        self.cells[:] = bytes(len(self.cells))
+        self.undo_stack = []
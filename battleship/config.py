@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import tempfile
+import warnings
+
+from battleship.placement import SlotIndex, add_slot_index, fleet_fits, slot_index
+
+RESERVED_CELLS = ('*', 'O', 'X')
+CACHE_VERSION = 2
+CACHE_DIR = os.environ.get('BATTLESHIP_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'battleship'))
+
+
+class ConfigError(ValueError):
+    pass
+
+
+class GameConfig:
+    """A checked game configuration together with everything derived from it
+
+    Besides the board size and the ships sorted by letter, it holds the SlotIndex of every ship size, with the
+    placement bitmasks on small boards, so a configuration loaded from the cache can place fleets right away.
+    """
+    def __init__(self, rows, columns, ship_dict, digest=None):
+        self.rows = rows
+        self.columns = columns
+        self.ship_dict = dict(sorted(ship_dict.items(), key=lambda item: item[0]))
+        self.digest = digest
+        self.slot_indexes = {size: slot_index(rows, columns, size) for size in sorted(set(ship_dict.values()))}
+
+    def to_json(self):
+        """Turns the configuration into plain JSON data, with every placement bitmask as a hex string"""
+        return {'version': CACHE_VERSION, 'digest': self.digest, 'rows': self.rows, 'columns': self.columns,
+                'ships': list(self.ship_dict.items()),
+                'masks': {size: None if index.masks is None else [format(mask, 'x') for mask in index.masks]
+                          for size, index in self.slot_indexes.items()}}
+
+    @classmethod
+    def from_json(cls, data):
+        """Rebuilds a configuration from what to_json made, without working out the bitmasks again"""
+        config = cls.__new__(cls)
+        config.rows = data['rows']
+        config.columns = data['columns']
+        config.ship_dict = dict(data['ships'])
+        config.digest = data['digest']
+        config.slot_indexes = {}
+        for size, masks in data['masks'].items():
+            size = int(size)
+            if masks is not None:
+                masks = [int(mask, 16) for mask in masks]
+            config.slot_indexes[size] = SlotIndex(config.rows, config.columns, size, masks)
+        return config
+
+    def install(self):
+        """Makes the placement code reuse the slot indexes stored in this configuration"""
+        for index in self.slot_indexes.values():
+            add_slot_index(index)
+
+    def __iter__(self):
+        return iter((self.rows, self.columns, self.ship_dict))
+
+    def __repr__(self):
+        return f'GameConfig(rows={self.rows}, columns={self.columns}, ship_dict={self.ship_dict!r})'
+
+
+def _positive_int(text, what, line_number):
+    try:
+        value = int(text)
+    except ValueError:
+        raise ConfigError(f'line {line_number}: the {what} has to be a whole number, not {text.strip()!r}') from None
+    if value < 1:
+        raise ConfigError(f'line {line_number}: the {what} has to be at least 1, not {value}')
+    return value
+
+
+def parse_config(text, digest=None):
+    """Reads and checks a configuration: the number of rows, the number of columns, the number of ships (or a blank
+    line), and then one ship per line in the form letter size
+        Parameters:
+            text (str): the contents of the configuration file
+            digest (str): the hash of the contents, kept on the result to identify it
+        Returns:
+            config (GameConfig): the checked configuration
+    """
+    lines = list(enumerate(text.splitlines(), 1))
+    if len(lines) < 2 or not lines[0][1].strip() or not lines[1][1].strip():
+        raise ConfigError('a configuration has to start with the number of rows and the number of columns')
+    rows = _positive_int(lines[0][1], 'number of rows', 1)
+    columns = _positive_int(lines[1][1], 'number of columns', 2)
+    ship_count = None
+    ship_lines = lines[2:]
+    if ship_lines and len(ship_lines[0][1].split()) == 1:
+        ship_count = _positive_int(ship_lines[0][1], 'number of ships', 3)
+        ship_lines = ship_lines[1:]
+    ship_lines = [(number, line) for number, line in ship_lines if line.strip()]
+    if not ship_lines:
+        raise ConfigError('a configuration needs at least one ship')
+    if ship_count is not None and ship_count != len(ship_lines):
+        raise ConfigError(f'line 3: says there are {ship_count} ships but {len(ship_lines)} are listed')
+    ship_dict = {}
+    for number, line in ship_lines:
+        ship_info = line.split()
+        if len(ship_info) != 2:
+            raise ConfigError(f'line {number}: a ship has to be written as letter size, not {line.strip()!r}')
+        letter, size = ship_info
+        if len(letter) != 1 or letter in RESERVED_CELLS:
+            raise ConfigError(f'line {number}: a ship has to be a single character other than '
+                              f'{", ".join(RESERVED_CELLS)}, not {letter!r}')
+        if letter in ship_dict:
+            raise ConfigError(f'line {number}: ship {letter} is listed twice')
+        size = _positive_int(size, f'size of ship {letter}', number)
+        if size > rows and size > columns:
+            raise ConfigError(f'line {number}: ship {letter} of size {size} does not fit on a {rows}x{columns} board')
+        ship_dict[letter] = size
+    if sum(ship_dict.values()) > rows * columns:
+        raise ConfigError(f'the ships take up {sum(ship_dict.values())} cells but the board only has {rows * columns}')
+    fits = fleet_fits(rows, columns, ship_dict)
+    if fits is False:
+        raise ConfigError(f'the ships cannot all be placed at once on a {rows}x{columns} board')
+    if fits is None:
+        warnings.warn(f'could not check that the ships can all be placed at once on a {rows}x{columns} board; '
+                      f'placing them may fail', stacklevel=2)
+    return GameConfig(rows, columns, ship_dict, digest)
+
+
+def _cache_path(digest, cache_dir):
+    return os.path.join(cache_dir, f'{digest}.json')
+
+
+def load_config(file, cache_dir=CACHE_DIR, use_cache=True):
+    """Loads a configuration file, reusing the compiled configuration cached for the same file contents
+        Parameters:
+            file (str): the path to the configuration file
+            cache_dir (str): where compiled configurations are kept
+            use_cache (bool): False to always parse the file and not touch the cache
+        Returns:
+            config (GameConfig): the checked configuration
+    """
+    with open(file, 'rb') as configuration:
+        data = configuration.read()
+    digest = hashlib.sha256(b'%d\n' % CACHE_VERSION + data).hexdigest()
+    path = _cache_path(digest, cache_dir)
+    if use_cache:
+        try:
+            with open(path, encoding='utf-8') as cached:
+                cached = json.load(cached)
+            if cached['version'] == CACHE_VERSION and cached['digest'] == digest:
+                config = GameConfig.from_json(cached)
+                config.install()
+                return config
+        except Exception:
+            # the cache only saves time, so a missing, cut short or garbled file is parsed again instead
+            pass
+    try:
+        text = data.decode('utf-8')
+    except UnicodeDecodeError:
+        raise ConfigError(f'{file} is not a text file') from None
+    config = parse_config(text, digest)
+    if use_cache:
+        temporary = None
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            handle, temporary = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+            with os.fdopen(handle, 'w', encoding='utf-8') as cached:
+                json.dump(config.to_json(), cached, separators=(',', ':'))
+            os.replace(temporary, path)
+            temporary = None
+        except OSError:
+            pass
+        finally:
+            if temporary is not None:
+                try:
+                    os.remove(temporary)
+                except OSError:
+                    pass
+    return config
+
+
+def read_config(file):
+    """Reads the dimensions of the battleship board and the ships from a configuration file
+        Parameters:
+            file (str): the path to the configuration file
+        Returns:
+            rows (int): the number of rows of the board
+            columns (int): the number of columns of the board
+            ship_dict (dict): a dictionary with the letter representing the ship as keys and the number of spaces it
+            takes up as values
+    """
+    config = load_config(file)
+    return config.rows, config.columns, config.ship_dict
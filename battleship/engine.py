@@ -0,0 +1,421 @@
+from battleship.backends import make_board, make_cell_indexes, make_free_index
+from battleship.firing_view import FiringView
+from battleship.fleet import Fleet, ship_cells
+from battleship.instrument import FIRE, PLACEMENT, SINK_CHECK, WIN_CHECK, clock
+from battleship.shared_state import SharedGameState
+from battleship.turns import TurnOrder
+
+MISS = 'miss'
+HIT = 'hit'
+SUNK = 'sunk'
+ELIMINATED = 'eliminated'
+WIN = 'win'
+
+
+class PlacementError(ValueError):
+    pass
+
+
+class ShotError(ValueError):
+    pass
+
+
+class ShotResult:
+    def __init__(self, player, target, row, col, outcome, letter=None):
+        self.player = player
+        self.target = target
+        self.row = row
+        self.col = col
+        self.outcome = outcome
+        self.letter = letter
+
+    def __repr__(self):
+        return (f'ShotResult(player={self.player!r}, target={self.target!r}, row={self.row}, col={self.col}, '
+                f'outcome={self.outcome!r}, letter={self.letter!r})')
+
+
+def shot_outcome(fleet, ship):
+    """Works out what a shot did to a fleet after Fleet.hit
+        Parameters:
+            fleet (Fleet): the fleet that was fired at
+            ship (Ship): what Fleet.hit returned for the shot
+        Returns:
+            outcome (str): MISS, HIT, SUNK or WIN
+    """
+    if ship is None:
+        return MISS
+    if fleet.all_sunk():
+        return WIN
+    if ship.sunk:
+        return SUNK
+    return HIT
+
+
+class GameEngine:
+    """Runs a game of battleship between two or more players without any terminal input or output
+
+    Ships are placed with place_ship and shots are taken with fire, which returns a ShotResult saying whether the
+    shot missed, hit, sank a ship or won the game. Mistakes like overlapping ships or firing at the same cell twice
+    raise PlacementError or ShotError instead of asking again, so the caller decides what to do about them. Given
+    Instruments, it times placing ships, firing, and the sink and win checks of every hit.
+
+    With more than two players every shot goes at one opponent's board, the next player still in the game unless
+    another target is given. Sinking a player's last ship knocks them out, ELIMINATED, until only the winner is left.
+    Turns pass around a TurnOrder, so a turn costs the same however many players there are or have been knocked out.
+    The last player beaten stays in it, so opponent is still who lost once the game is won.
+
+    After share, every change to the game is also written to a SharedGameState that other processes can read.
+    """
+    def __init__(self, rows, columns, ship_dict, players=('Player 1', 'Player 2'), backend='list', instruments=None):
+        if len(players) < 2:
+            raise ValueError('a game needs at least two players')
+        if len(set(players)) != len(players):
+            raise ValueError('players need different names')
+        self.rows = rows
+        self.columns = columns
+        self.ship_dict = dict(sorted(ship_dict.items(), key=lambda item: item[0]))
+        self.players = list(players)
+        self.backend = backend
+        self.instruments = instruments
+        empty_board = make_board(rows, columns, backend)
+        self.index = {player: index for index, player in enumerate(self.players)}
+        self.player_dict = {}
+        self.shots_at = {}
+        self.free_runs = {}
+        self.placements = {}
+        for player in self.players:
+            placement_board = empty_board if player == self.players[0] else empty_board.copy()
+            self.player_dict[player] = (placement_board, FiringView(placement_board), Fleet())
+            self.free_runs[player], self.shots_at[player] = make_cell_indexes(rows, columns, backend)
+            self.placements[player] = {}
+        self.order = TurnOrder(len(self.players))
+        self.history = []
+        self.undo_stack = []
+        self.turn = 0
+        self.winner = None
+        self.shared = None
+
+    def share(self, name=None):
+        """Puts the game in shared memory and keeps it there up to date, see battleship.shared_state
+            Parameters:
+                name (str): what to call the shared memory block, a random name if not given
+            Returns:
+                shared (SharedGameState): the block, whose name readers attach to and which close takes down
+        """
+        if self.history:
+            raise ShotError('a game has to be shared before the first shot')
+        if self.shared is not None:
+            raise ValueError(f'the game is already shared as {self.shared.name}')
+        self.shared = SharedGameState(self, name)
+        return self.shared
+
+    @property
+    def current_player(self):
+        return self.players[self.turn]
+
+    @property
+    def opponent(self):
+        """The current player's default target, the next player still in the game"""
+        return self.players[self.order.after(self.turn)]
+
+    def opponents(self, player=None):
+        """Lists the players still in the game that player, the current player if not given, can fire at"""
+        index = self.turn if player is None else self.index[player]
+        return [self.players[other] for other in self.order if other != index]
+
+    def is_eliminated(self, player):
+        return self.index[player] not in self.order
+
+    def placement_board(self, player):
+        return self.player_dict[player][0]
+
+    def firing_board(self, player, target=None):
+        """A read-only view of the shots fired at target, taken from their placement board with the ships hidden
+            Parameters:
+                player (str): the player looking at the board
+                target (str): whose board it shows, the next player after player in turn order if not given
+            Returns:
+                board (FiringView): the shots fired at target so far
+        """
+        if target is None:
+            target = self.players[self.order.after(self.index[player])]
+        return self.player_dict[target][1]
+
+    def fleet(self, player):
+        return self.player_dict[player][2]
+
+    def can_place(self, player, size, row, col, orientation):
+        """Checks if a ship fits on a player's placement board without leaving the board or overlapping another ship
+            Parameters:
+                player (str): the player who's placing the ship
+                size (int): the amount of space that the ship takes up on the board
+                row (int): the row of the ship's first cell
+                col (int): the column of the ship's first cell
+                orientation (str): 'horizontal' or 'vertical'
+            Returns:
+                bool: True if the ship can be placed there, False otherwise
+        """
+        if orientation not in ('horizontal', 'vertical'):
+            return False
+        return self.free_runs[player].fits(row, col, size, orientation)
+
+    def legal_anchors(self, player, size, orientation):
+        """Lists every (row, col) a ship of the given size and orientation can start at on a player's placement board"""
+        return self.free_runs[player].anchors(size, orientation)
+
+    def place_ship(self, player, letter, row, col, orientation):
+        """Places one of the configured ships on a player's placement board
+            Parameters:
+                player (str): the player who's placing the ship
+                letter (str): the letter that represents the ship
+                row (int): the row of the ship's first cell
+                col (int): the column of the ship's first cell
+                orientation (str): 'horizontal' or 'vertical'
+            Returns:
+                cells (list[tuple[int, int]]): the cells the ship now covers
+        """
+        start = clock() if self.instruments is not None else 0
+        if player not in self.player_dict:
+            raise PlacementError(f'unknown player {player!r}')
+        if letter not in self.ship_dict:
+            raise PlacementError(f'unknown ship {letter!r}')
+        fleet = self.fleet(player)
+        if letter in fleet:
+            raise PlacementError(f'{player} already placed their {letter}')
+        size = self.ship_dict[letter]
+        if not self.can_place(player, size, row, col, orientation):
+            raise PlacementError(f'{player}\'s {letter} does not fit at {row} {col} {orientation}')
+        board = self.placement_board(player)
+        cells = ship_cells(row, col, size, orientation)
+        for cell_row, cell_col in cells:
+            board[cell_row][cell_col] = letter
+        self.free_runs[player].occupy(cells)
+        fleet.add(letter, cells)
+        self.placements[player][letter] = (row, col, orientation)
+        if self.shared is not None:
+            self.shared.placed(self, self.index[player], letter, cells)
+        if self.instruments is not None:
+            self.instruments.record(PLACEMENT, start)
+        return cells
+
+    def place_fleet(self, player, placements):
+        """Places a player's whole fleet at once
+            Parameters:
+                player (str): the player who's placing the ships
+                placements (dict): each ship's letter mapped to its (row, col, orientation)
+            Returns: None
+        """
+        for letter, (row, col, orientation) in placements.items():
+            self.place_ship(player, letter, row, col, orientation)
+
+    def is_placed(self, player):
+        return len(self.fleet(player)) == len(self.ship_dict)
+
+    @property
+    def ready(self):
+        return all(self.is_placed(player) for player in self.players)
+
+    def fire(self, row, col, target=None):
+        """Fires the current player's shot at an opponent's placement board and passes the turn on
+            Parameters:
+                row (int): the row to fire at
+                col (int): the column to fire at
+                target (str): the player to fire at, the next player still in the game if not given
+            Returns:
+                result (ShotResult): who fired, where, and whether it was a miss, hit, sink, elimination or win
+        """
+        return self._shoot(row, col, target, False)
+
+    def apply_shot(self, row, col, target=None):
+        """Fires like fire does, but keeps what undo_shot needs to take the shot back, for searching ahead"""
+        return self._shoot(row, col, target, True)
+
+    def undo_shot(self):
+        """Takes back the latest shot, which has to have been made with apply_shot"""
+        if not self.undo_stack or self.undo_stack[-1][0] != len(self.history):
+            raise ShotError('the latest shot was not made with apply_shot')
+        shot_number, ship, turn, target_index = self.undo_stack.pop()
+        row, col = self.history.pop()
+        self.winner = None
+        self.turn = turn
+        target = self.players[target_index]
+        if target_index not in self.order:
+            self.order.restore(target_index)
+        self.shots_at[target].remove(row, col)
+        self.placement_board(target).undo_shot()
+        if ship is not None:
+            self.fleet(target).unhit(row, col, ship)
+        if self.shared is not None:
+            self.shared.undone(self, target_index, row, col, ship)
+
+    def salvo_size(self, player=None, target=None):
+        """How many shots a salvo is: one for every ship player, the current player if not given, has afloat, or
+        however many cells of target's board are left to fire at if that is fewer"""
+        player = self.current_player if player is None else player
+        if target is None:
+            target = self.players[self.order.after(self.index[player])]
+        return min(self.fleet(player).alive, self.rows * self.columns - len(self.shots_at[target]))
+
+    def fire_salvo(self, shots, target=None):
+        """Fires a salvo, every one of the current player's shots for the turn at once, and passes the turn on
+
+        The whole salvo is checked before any of it is fired, so a ShotError means nothing was fired. Which ships
+        sank is only looked at once every shot has landed, and whether the fleet is gone once after that.
+            Parameters:
+                shots (list[tuple[int, int]]): the (row, col) of every shot, salvo_size of them
+                target (str): the player to fire at, the next player still in the game if not given
+            Returns:
+                results (list[ShotResult]): one for every shot in order, where the last shot to hit a ship that sank
+                is SUNK, or ELIMINATED or WIN if that was the end of the fleet
+        """
+        instruments = self.instruments
+        start = clock() if instruments is not None else 0
+        self._check_can_fire()
+        turn = self.turn
+        player = self.players[turn]
+        target_index = self._target_index(turn, target)
+        target = self.players[target_index]
+        fired = self.shots_at[target]
+        size = self.salvo_size(player, target)
+        if len(shots) != size:
+            raise ShotError(f'{player} fires a salvo of {size} shots, not {len(shots)}')
+        salvo = set()
+        for row, col in shots:
+            if not (0 <= row < self.rows and 0 <= col < self.columns):
+                raise ShotError(f'{row} {col} is not on the board')
+            if (row, col) in fired:
+                raise ShotError(f'{target}\'s {row} {col} was already fired at')
+            if (row, col) in salvo:
+                raise ShotError(f'{row} {col} is in the salvo twice')
+            salvo.add((row, col))
+        placement_board, _, fleet = self.player_dict[target]
+        results = []
+        last_hits = {}
+        for row, col in shots:
+            fired.add(row, col)
+            self.history.append((row, col))
+            letter = placement_board[row][col]
+            if letter == '*':
+                placement_board[row][col] = 'O'
+                results.append(ShotResult(player, target, row, col, MISS))
+            else:
+                placement_board[row][col] = 'X'
+                last_hits[fleet.hit(row, col)] = len(results)
+                results.append(ShotResult(player, target, row, col, HIT, letter))
+        check = clock() if instruments is not None else 0
+        sank = [shot for ship, shot in last_hits.items() if ship.sunk]
+        for shot in sank:
+            results[shot].outcome = SUNK
+        if instruments is not None:
+            instruments.record(SINK_CHECK, check)
+            check = clock()
+        if sank and fleet.all_sunk():
+            last = results[max(sank)]
+            if self.order.alive > 2:
+                self.order.eliminate(target_index)
+                last.outcome = ELIMINATED
+            else:
+                last.outcome = WIN
+                self.winner = player
+        if instruments is not None:
+            instruments.record(WIN_CHECK, check)
+        if self.winner is None:
+            self.turn = self.order.after(turn)
+        if self.shared is not None:
+            self.shared.salvo(self, turn, target_index,
+                              [(result.row, result.col, fleet.ships[result.letter] if result.letter else None)
+                               for result in results])
+        if instruments is not None:
+            instruments.record(FIRE, start)
+            for result in results:
+                instruments.count(result.outcome)
+        return results
+
+    def _check_can_fire(self):
+        if self.winner is not None:
+            raise ShotError(f'the game is over, {self.winner} won')
+        if not self.ready:
+            raise ShotError('every ship has to be placed before firing')
+
+    def _target_index(self, turn, target):
+        """Works out who a shot from the player at turn goes at, checking that they can be fired at"""
+        if target is None:
+            return self.order.after(turn)
+        target_index = self.index.get(target)
+        if target_index is None:
+            raise ShotError(f'unknown player {target!r}')
+        if target_index == turn:
+            raise ShotError(f'{self.players[turn]} cannot fire at their own board')
+        if target_index not in self.order:
+            raise ShotError(f'{target} is already out of the game')
+        return target_index
+
+    def _shoot(self, row, col, target, undoable):
+        instruments = self.instruments
+        start = clock() if instruments is not None else 0
+        self._check_can_fire()
+        if not (0 <= row < self.rows and 0 <= col < self.columns):
+            raise ShotError(f'{row} {col} is not on the board')
+        turn = self.turn
+        player = self.players[turn]
+        target_index = self._target_index(turn, target)
+        target = self.players[target_index]
+        if not self.shots_at[target].add(row, col):
+            if len(self.players) == 2:
+                raise ShotError(f'{player} already fired at {row} {col}')
+            raise ShotError(f'{target}\'s {row} {col} was already fired at')
+        self.history.append((row, col))
+        placement_board, _, fleet = self.player_dict[target]
+        letter = placement_board[row][col]
+        hit = letter != '*'
+        if undoable:
+            placement_board.apply_shot(row, col, hit)
+        else:
+            placement_board[row][col] = 'X' if hit else 'O'
+        if hit:
+            if instruments is None:
+                ship = fleet.hit(row, col)
+                outcome = shot_outcome(fleet, ship)
+            else:
+                check = clock()
+                ship = fleet.hit(row, col)
+                instruments.record(SINK_CHECK, check)
+                check = clock()
+                outcome = shot_outcome(fleet, ship)
+                instruments.record(WIN_CHECK, check)
+            if outcome == WIN and self.order.alive > 2:
+                self.order.eliminate(target_index)
+                outcome = ELIMINATED
+            result = ShotResult(player, target, row, col, outcome, letter)
+        else:
+            ship = None
+            result = ShotResult(player, target, row, col, MISS)
+        if undoable:
+            self.undo_stack.append((len(self.history), ship, turn, target_index))
+        if result.outcome == WIN:
+            self.winner = player
+        else:
+            self.turn = self.order.after(turn)
+        if self.shared is not None:
+            self.shared.shot(self, turn, target_index, row, col, ship)
+        if instruments is not None:
+            instruments.record(FIRE, start)
+            instruments.count(result.outcome)
+        return result
+
+    def reset(self):
+        """Clears every board, fleet and shot so the engine can run another game with the same configuration"""
+        for player in self.players:
+            placement_board, firing_board, fleet = self.player_dict[player]
+            placement_board.clear_board()
+            self.player_dict[player] = (placement_board, firing_board, Fleet())
+            self.shots_at[player].clear()
+            self.free_runs[player] = make_free_index(self.rows, self.columns, self.backend)
+            self.placements[player] = {}
+        self.order = TurnOrder(len(self.players))
+        self.history = []
+        self.undo_stack = []
+        self.turn = 0
+        self.winner = None
+        if self.shared is not None:
+            self.shared.rewrite(self)
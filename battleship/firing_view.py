@@ -0,0 +1,59 @@
+SHOT_MARKS = ('X', 'O')
+
+
+class FiringRow:
+    def __init__(self, row):
+        self.row = row
+
+    def __getitem__(self, index):
+        cell = self.row[index]
+        if isinstance(index, slice):
+            return [mark if mark in SHOT_MARKS else '*' for mark in cell]
+        return cell if cell in SHOT_MARKS else '*'
+
+    def __setitem__(self, index, value):
+        raise TypeError('a firing board is read-only, it shows the shots on the opponent\'s placement board')
+
+    def __len__(self):
+        return len(self.row)
+
+    def __iter__(self):
+        for cell in self.row:
+            yield cell if cell in SHOT_MARKS else '*'
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class FiringView:
+    """A player's firing board, read straight off the opponent's placement board with the ships left out
+
+    Shots are only ever written to the placement board they land on, which already holds an 'X' or 'O' for every
+    cell fired at, so the firing board needs no cells of its own: it shows those marks and '*' for everything else,
+    whatever backend the placement board uses.
+    """
+    def __init__(self, board):
+        self.board = board
+
+    @property
+    def rows(self):
+        return self.board.rows
+
+    @property
+    def columns(self):
+        return self.board.columns
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [FiringRow(row) for row in self.board[index]]
+        return FiringRow(self.board[index])
+
+    def __len__(self):
+        return len(self.board)
+
+    def __iter__(self):
+        for row in self.board:
+            yield FiringRow(row)
+
+    def __repr__(self):
+        return '\n'.join([' '.join(row) for row in self])
@@ -0,0 +1,81 @@
+def ship_cells(row, col, size, orientation):
+    """Lists the cells a ship covers
+        Parameters:
+            row (int): the row of the ship's first cell
+            col (int): the column of the ship's first cell
+            size (int): the amount of space that the ship takes up on the board
+            orientation (str): 'horizontal' or 'vertical'
+        Returns:
+            cells (list[tuple[int, int]]): the (row, col) of every cell the ship covers
+    """
+    if orientation == 'horizontal':
+        return [(row, col + offset) for offset in range(size)]
+    return [(row + offset, col) for offset in range(size)]
+
+
+class Ship:
+    __slots__ = ('letter', 'cells', 'remaining', 'sunk')
+
+    def __init__(self, letter, cells):
+        self.letter = letter
+        self.cells = tuple(dict.fromkeys(cells))
+        self.remaining = len(self.cells)
+        self.sunk = self.remaining == 0
+
+
+class Fleet:
+    """Keeps track of where each ship on a placement board went and how many of its cells are still afloat
+
+    Hits are looked up by position, so resolving a shot, telling whether it sank a ship and telling whether the
+    whole fleet is gone never has to look at the rest of the board.
+    """
+    def __init__(self):
+        self.ships = {}
+        self.positions = {}
+        self.alive = 0
+
+    def add(self, letter, cells):
+        ship = Ship(letter, cells)
+        self.ships[letter] = ship
+        for cell in ship.cells:
+            self.positions[cell] = ship
+        if not ship.sunk:
+            self.alive += 1
+        return ship
+
+    def hit(self, row, col):
+        """Records a shot against the fleet
+            Parameters:
+                row (int): the row that was fired at
+                col (int): the column that was fired at
+            Returns:
+                ship (Ship): the ship that was hit, or None if the shot missed or the cell was already hit
+        """
+        ship = self.positions.pop((row, col), None)
+        if ship is None:
+            return None
+        ship.remaining -= 1
+        if ship.remaining == 0:
+            ship.sunk = True
+            self.alive -= 1
+        return ship
+
+    def unhit(self, row, col, ship):
+        """Takes back a hit that Fleet.hit returned ship for"""
+        self.positions[(row, col)] = ship
+        if ship.sunk:
+            ship.sunk = False
+            self.alive += 1
+        ship.remaining += 1
+
+    def is_sunk(self, letter):
+        return self.ships[letter].sunk
+
+    def all_sunk(self):
+        return self.alive == 0
+
+    def __contains__(self, letter):
+        return letter in self.ships
+
+    def __len__(self):
+        return len(self.ships)
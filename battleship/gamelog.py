@@ -0,0 +1,256 @@
+"""Compact binary logs of finished games and a replay engine for them
+
+A log file is a sequence of game records that can be appended to at any time. Every record is
+
+    b'BG' | varint payload length | payload
+
+and the payload holds, in order: the 32-byte SHA-256 config hash, rows, columns, the number of ships, each ship as
+(letter length, UTF-8 letter, size), the number of players, each player name as (length, UTF-8 name), each player's
+ships in ship_dict order as one varint (row * columns + col) * 2 + vertical, the number of shots, and every shot as a
+varint cell index row * columns + col. Shots alternate between the players starting with the first one, so who fired
+them does not need to be stored. All integers are unsigned LEB128 varints.
+"""
+import hashlib
+import random
+
+from battleship.engine import GameEngine
+from battleship.simulate import SimulationStats, play_fleet
+
+MAGIC = b'BG'
+
+
+def config_hash(rows, columns, ship_dict):
+    """Hashes a configuration independently of how its file was formatted"""
+    lines = [str(rows), str(columns)] + [f'{letter} {size}' for letter, size in sorted(ship_dict.items())]
+    return hashlib.sha256('\n'.join(lines).encode('utf-8')).digest()
+
+
+def write_varint(buffer, value):
+    while value > 0x7f:
+        buffer.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data, position):
+    start = position
+    value = 0
+    shift = 0
+    try:
+        while True:
+            byte = data[position]
+            position += 1
+            value |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return value, position
+            shift += 7
+    except IndexError:
+        raise ValueError(f'the game record ends in the middle of a number at byte {start}') from None
+
+
+def _write_text(buffer, text):
+    encoded = text.encode('utf-8')
+    write_varint(buffer, len(encoded))
+    buffer.extend(encoded)
+
+
+def _read_text(data, position):
+    length, position = read_varint(data, position)
+    if position + length > len(data):
+        raise ValueError(f'the game record ends in the middle of a name at byte {position}')
+    try:
+        return bytes(data[position:position + length]).decode('utf-8'), position + length
+    except UnicodeDecodeError:
+        raise ValueError(f'the game record has a name that is not UTF-8 at byte {position}') from None
+
+
+class GameRecord:
+    """Everything needed to play a logged game again: the configuration, both fleets and every shot in order"""
+    def __init__(self, rows, columns, ship_dict, players, placements, shots):
+        self.rows = rows
+        self.columns = columns
+        self.ship_dict = dict(sorted(ship_dict.items(), key=lambda item: item[0]))
+        self.players = list(players)
+        self.placements = placements
+        self.shots = shots
+
+    @classmethod
+    def from_engine(cls, engine):
+        placements = {player: dict(engine.placements[player]) for player in engine.players}
+        return cls(engine.rows, engine.columns, engine.ship_dict, engine.players, placements, list(engine.history))
+
+    @property
+    def config_hash(self):
+        return config_hash(self.rows, self.columns, self.ship_dict)
+
+    def encode(self):
+        payload = bytearray(self.config_hash)
+        write_varint(payload, self.rows)
+        write_varint(payload, self.columns)
+        write_varint(payload, len(self.ship_dict))
+        for letter, size in self.ship_dict.items():
+            _write_text(payload, letter)
+            write_varint(payload, size)
+        write_varint(payload, len(self.players))
+        for player in self.players:
+            _write_text(payload, player)
+        for player in self.players:
+            for letter in self.ship_dict:
+                row, col, orientation = self.placements[player][letter]
+                write_varint(payload, (row * self.columns + col) * 2 + (orientation == 'vertical'))
+        write_varint(payload, len(self.shots))
+        for row, col in self.shots:
+            write_varint(payload, row * self.columns + col)
+        record = bytearray(MAGIC)
+        write_varint(record, len(payload))
+        return bytes(record + payload)
+
+    @classmethod
+    def decode(cls, payload):
+        """Builds a record from a payload, the part of a log record after its length"""
+        digest = bytes(payload[:32])
+        position = 32
+        rows, position = read_varint(payload, position)
+        columns, position = read_varint(payload, position)
+        if not rows or not columns:
+            raise ValueError(f'the game record has a {rows}x{columns} board')
+        ship_count, position = read_varint(payload, position)
+        ship_dict = {}
+        for ship in range(ship_count):
+            letter, position = _read_text(payload, position)
+            ship_dict[letter], position = read_varint(payload, position)
+        player_count, position = read_varint(payload, position)
+        players = []
+        for player in range(player_count):
+            name, position = _read_text(payload, position)
+            players.append(name)
+        placements = {}
+        for player in players:
+            placements[player] = {}
+            for letter in ship_dict:
+                value, position = read_varint(payload, position)
+                row, col = divmod(value >> 1, columns)
+                placements[player][letter] = (row, col, 'vertical' if value & 1 else 'horizontal')
+        shot_count, position = read_varint(payload, position)
+        shots = []
+        for shot in range(shot_count):
+            cell, position = read_varint(payload, position)
+            shots.append(divmod(cell, columns))
+        record = cls(rows, columns, ship_dict, players, placements, shots)
+        if record.config_hash != digest:
+            raise ValueError('the game record does not match its config hash')
+        return record
+
+
+class GameLogWriter:
+    """Appends game records to a log file, creating it if needed"""
+    def __init__(self, path):
+        self.file = open(path, 'ab')
+
+    def write(self, record):
+        self.file.write(record.encode())
+
+    def write_engine(self, engine):
+        self.write(GameRecord.from_engine(engine))
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def append_game(path, engine):
+    with GameLogWriter(path) as writer:
+        writer.write_engine(engine)
+
+
+def read_payloads(path):
+    """Yields the payload of every record in a log one at a time, without reading the whole file into memory"""
+    with open(path, 'rb') as log:
+        while True:
+            magic = log.read(2)
+            if not magic:
+                return
+            if magic != MAGIC:
+                raise ValueError(f'{path} is not a game log or is damaged at byte {log.tell() - len(magic)}')
+            length = 0
+            shift = 0
+            while True:
+                byte = log.read(1)
+                if not byte:
+                    raise ValueError(f'{path} ends in the middle of a record')
+                length |= (byte[0] & 0x7f) << shift
+                if byte[0] < 0x80:
+                    break
+                shift += 7
+            payload = log.read(length)
+            if len(payload) != length:
+                raise ValueError(f'{path} ends in the middle of a record')
+            yield payload
+
+
+def read_games(path):
+    """Yields every GameRecord in a log lazily"""
+    for payload in read_payloads(path):
+        yield GameRecord.decode(payload)
+
+
+def replay(record, turn=None, backend='list'):
+    """Plays a logged game again up to a given turn
+        Parameters:
+            record (GameRecord): the logged game
+            turn (int): how many shots to play, all of them if not given
+            backend (str): the board backend the engine uses
+        Returns:
+            engine (GameEngine): the game as it stood after that many shots
+    """
+    engine = GameEngine(record.rows, record.columns, record.ship_dict, record.players, backend)
+    for player in record.players:
+        engine.place_fleet(player, record.placements[player])
+    shots = record.shots if turn is None else record.shots[:turn]
+    for row, col in shots:
+        engine.fire(row, col)
+    return engine
+
+
+def replay_log(path, backend='list'):
+    """Replays every game in a log through the engine
+        Parameters:
+            path (str): the log file
+            backend (str): the board backend the engine uses
+        Returns:
+            games (int): how many games were replayed
+            winners (dict): how many games each player name won, with None for games that were not finished
+    """
+    games = 0
+    winners = {}
+    for record in read_games(path):
+        winner = replay(record, backend=backend).winner
+        winners[winner] = winners.get(winner, 0) + 1
+        games += 1
+    return games, winners
+
+
+def rerun_strategy(path, strategy, seed=0):
+    """Lets a strategy fire at every fleet in a log, to compare strategies on exactly the same fleets
+        Parameters:
+            path (str): the log file
+            strategy (str): the name of the strategy doing the firing
+            seed (int): where the strategy's randomness comes from
+        Returns:
+            stats (SimulationStats): the shots to win against every logged fleet
+    """
+    rng = random.Random(seed)
+    stats = SimulationStats(strategy, seed)
+    for record in read_games(path):
+        for player in record.players:
+            shots = play_fleet(record.rows, record.columns, record.ship_dict, record.placements[player], strategy, rng)
+            stats.add({shots: 1})
+    return stats
@@ -0,0 +1,70 @@
+"""Counters and latency histograms for the phases of a game, to see where its time goes
+
+Code that can be instrumented takes an Instruments, or None, and only times anything when it was given one, so an
+uninstrumented game pays for one None check per hook and nothing else.
+"""
+import array
+import time
+
+CONFIG = 'config'
+PLACEMENT = 'placement'
+FIRE = 'fire'
+SINK_CHECK = 'sink check'
+WIN_CHECK = 'win check'
+RENDER = 'render'
+PHASES = (CONFIG, PLACEMENT, FIRE, SINK_CHECK, WIN_CHECK, RENDER)
+
+clock = time.perf_counter_ns
+
+
+class Histogram:
+    """Counts latencies in power of two buckets of nanoseconds, so it stays the same size however many it is given"""
+    def __init__(self):
+        self.buckets = array.array('Q', bytes(8 * 64))
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, nanoseconds):
+        self.buckets[nanoseconds.bit_length()] += 1
+        self.count += 1
+        self.total += nanoseconds
+        if nanoseconds > self.max:
+            self.max = nanoseconds
+
+    def percentile(self, percent):
+        """The upper edge of the bucket the given percentile falls in, in nanoseconds"""
+        wanted = self.count * percent / 100
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= wanted:
+                return min((1 << bucket) - 1, self.max)
+        return self.max
+
+
+class Instruments:
+    """Collects how often each phase ran and how long it took, plus any other counters the hooks keep"""
+    def __init__(self):
+        self.phases = {phase: Histogram() for phase in PHASES}
+        self.counters = {}
+
+    def record(self, phase, start):
+        """Records a phase that started at start, a reading of clock()"""
+        self.phases[phase].add(clock() - start)
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def report(self):
+        lines = [f'{"phase":>12} {"count":>9} {"total ms":>10} {"mean us":>9} {"p50 us":>9} {"p99 us":>9} '
+                 f'{"max us":>9}']
+        for phase, histogram in self.phases.items():
+            if not histogram.count:
+                continue
+            lines.append(f'{phase:>12} {histogram.count:>9} {histogram.total / 1e6:>10.2f} '
+                         f'{histogram.total / histogram.count / 1e3:>9.2f} {histogram.percentile(50) / 1e3:>9.2f} '
+                         f'{histogram.percentile(99) / 1e3:>9.2f} {histogram.max / 1e3:>9.2f}')
+        if self.counters:
+            lines.append('  '.join(f'{name}: {count}' for name, count in sorted(self.counters.items())))
+        return '\n'.join(lines)
@@ -0,0 +1,112 @@
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+EMPTY = 0
+MISS = 1
+HIT = 2
+FIRST_SHIP = 3
+BASE_CELLS = ('*', 'O', 'X')
+
+
+class NumpyRow:
+    def __init__(self, board, row):
+        self.board = board
+        self.row = row
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            letters = self.board.letters
+            return [letters[code] for code in self.board.cells[self.row, index].tolist()]
+        return self.board.letters[self.board.cells[self.row, index]]
+
+    def __setitem__(self, index, value):
+        self.board.cells[self.row, index] = self.board.code(value)
+
+    def __len__(self):
+        return self.board.columns
+
+    def __iter__(self):
+        letters = self.board.letters
+        return iter([letters[code] for code in self.board.cells[self.row].tolist()])
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class NumpyBoard:
+    """A battleship board stored as one NumPy uint8 array
+
+    Each cell holds a small code: 0 is empty, 1 a miss, 2 a hit and 3 onwards one code per ship letter. Creating and
+    copying a board is a single array operation, which keeps boards of several thousand rows and columns practical.
+    Sink and win checks stay with the engine's Fleet, which never looks at the board. board[row][col] still reads and
+    writes the same single characters as Board.
+    """
+    def __init__(self, rows, columns):
+        if numpy is None:
+            raise ImportError('the numpy board backend needs numpy, install it with pip install numpy')
+        self.rows = rows
+        self.columns = columns
+        self.cells = numpy.zeros((rows, columns), dtype=numpy.uint8)
+        self.letters = list(BASE_CELLS)
+        self.codes = {letter: code for code, letter in enumerate(BASE_CELLS)}
+        self.undo_stack = []
+
+    def code(self, letter):
+        code = self.codes.get(letter)
+        if code is None:
+            code = len(self.letters)
+            if code > 255:
+                raise ValueError('a numpy board holds at most 253 different ship letters')
+            self.letters.append(letter)
+            self.codes[letter] = code
+        return code
+
+    def cell(self, row, col):
+        return self.letters[self.cells[row, col]]
+
+    def set_cell(self, row, col, value):
+        self.cells[row, col] = self.code(value)
+
+    def copy(self):
+        board = NumpyBoard.__new__(NumpyBoard)
+        board.rows = self.rows
+        board.columns = self.columns
+        board.cells = self.cells.copy()
+        board.letters = list(self.letters)
+        board.codes = dict(self.codes)
+        board.undo_stack = []
+        return board
+
+    def apply_shot(self, row, col, hit):
+        """Marks a cell hit or missed, remembering its code so undo_shot can put it back"""
+        self.undo_stack.append((row, col, self.cells[row, col]))
+        self.cells[row, col] = HIT if hit else MISS
+
+    def undo_shot(self):
+        row, col, code = self.undo_stack.pop()
+        self.cells[row, col] = code
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [NumpyRow(self, row) for row in range(*index.indices(self.rows))]
+        if index < 0:
+            index += self.rows
+        if not 0 <= index < self.rows:
+            raise IndexError('row index out of range')
+        return NumpyRow(self, index)
+
+    def __len__(self):
+        return self.rows
+
+    def __iter__(self):
+        for row in range(self.rows):
+            yield NumpyRow(self, row)
+
+    def __repr__(self):
+        return '\n'.join([' '.join(row) for row in self])
+
+    def clear_board(self):
+        self.cells.fill(EMPTY)
+        self.undo_stack = []
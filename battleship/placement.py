@@ -0,0 +1,396 @@
+import array
+import functools
+import random
+
+from battleship.fleet import ship_cells
+
+ORIENTATIONS = ('horizontal', 'vertical')
+MASK_CELLS = 64 * 64
+
+
+class SlotIndex:
+    """Numbers every spot a ship of one size fits at on an empty board
+
+    Spots 0 to horizontal - 1 are horizontal and go left to right, top to bottom, and the vertical ones follow, so a
+    random spot is a single random number and its position is worked out arithmetically. On boards of up to
+    MASK_CELLS cells every spot also gets an integer bitmask of the cells it covers, so overlap checks are one &.
+    Masks that were already worked out, such as ones read from a compiled configuration, can be passed in.
+    """
+    def __init__(self, rows, columns, size, masks=None):
+        self.rows = rows
+        self.columns = columns
+        self.size = size
+        self.horizontal = rows * (columns - size + 1) if size <= columns else 0
+        self.vertical = (rows - size + 1) * columns if 1 < size <= rows else 0
+        self.count = self.horizontal + self.vertical
+        self.masks = None
+        if masks is not None:
+            self.masks = tuple(masks)
+        elif rows * columns <= MASK_CELLS:
+            self.masks = tuple(self.mask(index) for index in range(self.count))
+
+    def slot(self, index):
+        if index < self.horizontal:
+            row, col = divmod(index, self.columns - self.size + 1)
+            return 'horizontal', row, col
+        row, col = divmod(index - self.horizontal, self.columns)
+        return 'vertical', row, col
+
+    def number(self, orientation, row, col):
+        if orientation == 'horizontal':
+            return row * (self.columns - self.size + 1) + col
+        return self.horizontal + row * self.columns + col
+
+    def cells(self, index):
+        """Returns the cells a spot covers as a range of row * columns + col"""
+        orientation, row, col = self.slot(index)
+        start = row * self.columns + col
+        step = 1 if orientation == 'horizontal' else self.columns
+        return range(start, start + step * self.size, step)
+
+    def mask(self, index):
+        mask = 0
+        for cell in self.cells(index):
+            mask |= 1 << cell
+        return mask
+
+
+class FreeRunIndex:
+    """Keeps, for every cell, how many free cells in a row start there going right and going down
+
+    A ship of size k fits at a cell exactly when the run in its direction is at least k, so checking a placement is
+    one lookup. Placing or removing a ship only rewrites the runs of the cells before it in the same row and column.
+    The runs of an empty board are built by repeating whole rows, so making one costs little more than the memory.
+    """
+    def __init__(self, rows, columns):
+        self.rows = rows
+        self.columns = columns
+        self.right = array.array('I', range(columns, 0, -1)) * rows
+        self.down = array.array('I')
+        for run in range(rows, 0, -1):
+            self.down.extend(array.array('I', (run,)) * columns)
+
+    def run(self, row, col, orientation):
+        if not (0 <= row < self.rows and 0 <= col < self.columns):
+            return 0
+        runs = self.right if orientation == 'horizontal' else self.down
+        return runs[row * self.columns + col]
+
+    def fits(self, row, col, size, orientation):
+        """Checks if a ship of the given size starting at (row, col) stays on the board and only covers free cells"""
+        return self.run(row, col, orientation) >= size
+
+    def anchors(self, size, orientation):
+        """Lists every (row, col) a ship of the given size and orientation can start at"""
+        runs = self.right if orientation == 'horizontal' else self.down
+        return [divmod(cell, self.columns) for cell, run in enumerate(runs) if run >= size]
+
+    def _update(self, cells, free):
+        right, down, columns, rows = self.right, self.down, self.columns, self.rows
+        for row, col in cells:
+            cell = row * columns + col
+            if free:
+                right[cell] = (right[cell + 1] if col + 1 < columns else 0) + 1
+                down[cell] = (down[cell + columns] if row + 1 < rows else 0) + 1
+            else:
+                right[cell] = 0
+                down[cell] = 0
+            run = right[cell]
+            left = cell - 1
+            for before in range(col):
+                if not right[left]:
+                    break
+                run += 1
+                right[left] = run
+                left -= 1
+            run = down[cell]
+            above = cell - columns
+            for before in range(row):
+                if not down[above]:
+                    break
+                run += 1
+                down[above] = run
+                above -= columns
+
+    def occupy(self, cells):
+        """Marks cells as taken by a ship, given as (row, col)"""
+        self._update(cells, False)
+
+    def release(self, cells):
+        """Marks cells as free again, given as (row, col)"""
+        self._update(reversed(list(cells)), True)
+
+
+class OccupiedCells:
+    """Answers the same questions as FreeRunIndex from the set of cells ships cover, for boards too big to keep runs for
+
+    Checking a placement looks at each cell the ship would cover, so it takes as long as the ship is long, and memory
+    grows with the ships placed instead of with the board. Listing anchors still looks at every cell of the board.
+    """
+    def __init__(self, rows, columns):
+        self.rows = rows
+        self.columns = columns
+        self.taken = set()
+
+    def fits(self, row, col, size, orientation):
+        """Checks if a ship of the given size starting at (row, col) stays on the board and only covers free cells"""
+        if not (0 <= row < self.rows and 0 <= col < self.columns):
+            return False
+        if orientation == 'horizontal':
+            if col + size > self.columns:
+                return False
+        elif row + size > self.rows:
+            return False
+        return self.taken.isdisjoint(ship_cells(row, col, size, orientation))
+
+    def anchors(self, size, orientation):
+        """Lists every (row, col) a ship of the given size and orientation can start at"""
+        return [(row, col) for row in range(self.rows) for col in range(self.columns)
+                if self.fits(row, col, size, orientation)]
+
+    def occupy(self, cells):
+        """Marks cells as taken by a ship, given as (row, col)"""
+        self.taken.update(cells)
+
+    def release(self, cells):
+        """Marks cells as free again, given as (row, col)"""
+        self.taken.difference_update(cells)
+
+
+_slot_indexes = {}
+
+
+def slot_index(rows, columns, size):
+    """Returns the SlotIndex for a board and ship size, building it the first time it is asked for"""
+    index = _slot_indexes.get((rows, columns, size))
+    if index is None:
+        index = _slot_indexes[rows, columns, size] = SlotIndex(rows, columns, size)
+    return index
+
+
+def add_slot_index(index):
+    """Reuses an already built SlotIndex, such as one loaded from a compiled configuration"""
+    _slot_indexes.setdefault((index.rows, index.columns, index.size), index)
+
+
+@functools.lru_cache(maxsize=None)
+def ship_slots(rows, columns, size):
+    """Lists every spot a ship of the given size fits at on an empty board, numbered the same way as SlotIndex
+        Parameters:
+            rows (int): the number of rows of the board
+            columns (int): the number of columns of the board
+            size (int): the amount of space that the ship takes up on the board
+        Returns:
+            slots (tuple[tuple[str, int, int]]): the (orientation, row, col) of every spot
+            slot_cells (tuple[tuple[int]]): the cells each spot covers, as row * columns + col
+            cover (tuple[tuple[int]]): for every cell, the index of each spot that covers it
+    """
+    index = slot_index(rows, columns, size)
+    slots = tuple(index.slot(slot) for slot in range(index.count))
+    slot_cells = tuple(tuple(index.cells(slot)) for slot in range(index.count))
+    cover = [[] for cell in range(rows * columns)]
+    for slot, cells in enumerate(slot_cells):
+        for cell in cells:
+            cover[cell].append(slot)
+    return slots, slot_cells, tuple(tuple(slot_indexes) for slot_indexes in cover)
+
+
+@functools.lru_cache(maxsize=256)
+def fleet_slot_indexes(rows, columns, ships):
+    """Looks up the SlotIndex of every ship, biggest first so the hardest ships are placed while the board is empty"""
+    indexes = []
+    for letter, size in sorted(ships, key=lambda item: -item[1]):
+        index = slot_index(rows, columns, size)
+        if index.count == 0:
+            raise ValueError(f'ship {letter} of size {size} does not fit on a {rows}x{columns} board')
+        indexes.append((letter, index))
+    return tuple(indexes)
+
+
+def _sample_masks(indexes, random_, attempts):
+    taken = 0
+    chosen = []
+    for letter, index in indexes:
+        masks = index.masks
+        count = index.count
+        for attempt in range(attempts):
+            slot = int(random_() * count)
+            mask = masks[slot]
+            if not taken & mask:
+                taken |= mask
+                chosen.append((letter, index, slot))
+                break
+        else:
+            return None
+    return chosen
+
+
+def _sample_cells(indexes, random_, attempts):
+    taken = set()
+    chosen = []
+    for letter, index in indexes:
+        count = index.count
+        for attempt in range(attempts):
+            slot = int(random_() * count)
+            cells = index.cells(slot)
+            if taken.isdisjoint(cells):
+                taken.update(cells)
+                chosen.append((letter, index, slot))
+                break
+        else:
+            return None
+    return chosen
+
+
+def _search(rows, columns, indexes, rng, budget):
+    """Fills the board cell by cell in row order, looking for spots for every ship, until budget[0] tries run out
+
+    All the cells before the first undecided one are either covered or left empty for good, so a ship covering that
+    cell has to start there: the only choices are which size of ship goes there going right or down, or leaving the
+    cell empty if there are more free cells left than the ships still need. A branch is dropped as soon as the free
+    cells after it cannot hold the ships still to place. The choices are tried in a random order if rng is given, and
+    otherwise biggest ship first, across before down, and leaving the cell empty last.
+        Returns:
+            chosen (list): the (letter, index, slot) of every ship, or None if the fleet does not fit or the tries ran
+            out, which budget[0] being 0 tells apart
+    """
+    cells = rows * columns
+    ships = {}
+    for letter, index in indexes:
+        ships.setdefault(index.size, (index, []))[1].append(letter)
+    if rng is not None:
+        for index, letters in ships.values():
+            rng.shuffle(letters)
+    sizes = sorted(ships, reverse=True)
+    area = sum(index.size for letter, index in indexes)
+    occupied = set()
+    chosen = []
+
+    def advance(cell, ahead):
+        while cell < cells and cell in occupied:
+            cell += 1
+            ahead -= 1
+        return cell, ahead
+
+    def choices(cell, ahead):
+        row, col = divmod(cell, columns)
+        found = []
+        for size in sizes:
+            if not ships[size][1]:
+                continue
+            if col + size <= columns and all(cell + offset not in occupied for offset in range(size)):
+                found.append((size, 'horizontal', range(cell, cell + size)))
+            if size > 1 and row + size <= rows and all(cell + offset * columns not in occupied
+                                                       for offset in range(size)):
+                found.append((size, 'vertical', range(cell, cell + size * columns, columns)))
+        if cells - cell - ahead - 1 >= area:
+            found.append(None)
+        if rng is not None:
+            rng.shuffle(found)
+        return found
+
+    # each frame is [cell, ahead, choices, next choice, choice applied], ahead counting the occupied cells from cell on
+    stack = [[0, 0, choices(0, 0), 0, None]]
+    while stack:
+        frame = stack[-1]
+        applied = frame[4]
+        if applied is not None:
+            size, orientation, covered = applied
+            letter, index, slot = chosen.pop()
+            ships[size][1].append(letter)
+            occupied.difference_update(covered)
+            area += size
+            frame[4] = None
+        cell, ahead, options, number = frame[:4]
+        if number == len(options):
+            stack.pop()
+            continue
+        if budget[0] <= 0:
+            return None
+        budget[0] -= 1
+        frame[3] += 1
+        choice = options[number]
+        if choice is None:
+            next_cell, next_ahead = advance(cell + 1, ahead)
+        else:
+            size, orientation, covered = choice
+            index, letters = ships[size]
+            row, col = divmod(cell, columns)
+            chosen.append((letters.pop(), index, index.number(orientation, row, col)))
+            occupied.update(covered)
+            area -= size
+            frame[4] = choice
+            if not area:
+                return chosen
+            next_cell, next_ahead = advance(cell, ahead + size)
+        if cells - next_cell - next_ahead >= area:
+            stack.append([next_cell, next_ahead, choices(next_cell, next_ahead), 0, None])
+    return None
+
+
+def _exact_fleet(rows, columns, indexes, rng, max_nodes):
+    """Runs _search with random choices on half the tries, then in the fixed order on the rest if those ran out
+        Returns:
+            chosen (list): the (letter, index, slot) of every ship, or None
+            proven (bool): True if no fleet was found because none fits, False if the tries ran out
+    """
+    if sum(index.size for letter, index in indexes) > rows * columns:
+        return None, True
+    budget = [max_nodes // 2]
+    chosen = _search(rows, columns, indexes, rng, budget)
+    if chosen is not None or budget[0] > 0:
+        return chosen, chosen is None
+    budget = [max_nodes - max_nodes // 2]
+    chosen = _search(rows, columns, indexes, None, budget)
+    return chosen, chosen is None and budget[0] > 0
+
+
+def fleet_fits(rows, columns, ship_dict, max_nodes=100000):
+    """Tells whether every ship in the configuration can be on the board at once
+        Returns:
+            fits (bool): True or False, or None if max_nodes tries were not enough to tell
+    """
+    try:
+        indexes = fleet_slot_indexes(rows, columns, tuple(ship_dict.items()))
+    except ValueError:
+        return False
+    if _sample_cells(indexes, random.Random(0).random, 100) is not None:
+        return True
+    chosen, proven = _exact_fleet(rows, columns, indexes, None, max_nodes)
+    if chosen is not None:
+        return True
+    return False if proven else None
+
+
+def random_fleet(rows, columns, ship_dict, rng=None, attempts=100, restarts=20, max_nodes=100000):
+    """Places every ship in the configuration at random without overlaps, raising ValueError if the fleet does not fit
+    or the search for a way to fit it gives up
+        Parameters:
+            rows (int): the number of rows of the board
+            columns (int): the number of columns of the board
+            ship_dict (dict): each ship's letter mapped to its size
+            rng (random.Random): where the randomness comes from, so fleets can be reproduced from a seed
+            attempts (int): how many random spots to try for each ship before starting the fleet over
+            restarts (int): how many times to start over before searching for a fleet that fits cell by cell
+            max_nodes (int): how many choices that search may make before giving up
+        Returns:
+            placements (dict): each ship's letter mapped to its (row, col, orientation)
+    """
+    rng = rng or random.Random()
+    indexes = fleet_slot_indexes(rows, columns, tuple(ship_dict.items()))
+    sample = _sample_masks if rows * columns <= MASK_CELLS else _sample_cells
+    for restart in range(restarts):
+        chosen = sample(indexes, rng.random, attempts)
+        if chosen is not None:
+            break
+    else:
+        chosen, proven = _exact_fleet(rows, columns, indexes, rng, max_nodes)
+        if chosen is None and proven:
+            raise ValueError(f'the fleet does not fit on a {rows}x{columns} board')
+        if chosen is None:
+            raise ValueError(f'no way to fit the fleet on a {rows}x{columns} board was found in {max_nodes} tries')
+    placements = {}
+    for letter, index, slot in chosen:
+        orientation, row, col = index.slot(slot)
+        placements[letter] = (row, col, orientation)
+    return placements
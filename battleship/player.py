@@ -7,3 +7,16 @@ class Player:
         player2 = input("Player 2, please enter your name: ")
         self.players = [player1, player2]
         return self.players
+
+    def asking_names(self, count):
+        self.players = []
+        while len(self.players) < count:
+            name = input(f"Player {len(self.players) + 1}, please enter your name: ")
+            if name not in self.players:
+                self.players.append(name)
+        return self.players
+
+    def asking_name_against_computer(self, computer_name):
+        player1 = input("Player 1, please enter your name: ")
+        self.players = [player1, computer_name]
+        return self.players
@@ -0,0 +1,344 @@
+"""A referee that plays bots written as separate programs against each other
+
+Bots are started once and play game after game, talking JSON, one object per line, over their stdin and stdout.
+The referee sends:
+
+    {"type": "start", "game": 0, "rows": 10, "columns": 10, "ships": {"P": 2, ...}, "you": "bot1", "opponent": "bot2"}
+    {"type": "place", "letter": "P", "size": 2}      answered with {"orientation": "h", "row": 0, "col": 0}
+    {"type": "fire"}                                 answered with {"row": 3, "col": 4}
+    {"type": "result", "player": "bot1", "row": 3, "col": 4, "outcome": "hit", "letter": "P"}
+    {"type": "end", "winner": "bot2", "reason": "win"}
+    {"type": "quit"}
+
+The orientation is any start of horizontally or vertically, as main.py asks for it. Only place and fire are
+answered, and anything a bot writes that is not the answer to a question, like a second answer to one, is thrown
+away. A bot loses the game if it takes longer than the move time limit to answer, exits, or answers with something
+that is not a legal move, and a bot that lost any of those ways is restarted before its next game.
+"""
+import array
+import json
+import math
+import queue
+import random
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from battleship.engine import WIN, GameEngine, PlacementError, ShotError, ShotResult
+from battleship.placement import random_fleet
+from battleship.strategies import make_strategy
+
+STARTUP_TIMEOUT = 10.0
+TIMEOUT = 'timeout'
+CRASH = 'crash'
+INVALID = 'invalid'
+
+
+class BotError(Exception):
+    """A bot broke the rules; name is the bot and reason is TIMEOUT, CRASH or INVALID"""
+    def __init__(self, name, reason, message):
+        super().__init__(message)
+        self.name = name
+        self.reason = reason
+
+
+class LatencyStats:
+    """Collects how long a bot took over every move it answered"""
+    def __init__(self):
+        self.latencies = array.array('d')
+
+    def add(self, seconds):
+        self.latencies.append(seconds)
+
+    def merge(self, other):
+        self.latencies.extend(other.latencies)
+
+    def percentile(self, percent, ordered=None):
+        ordered = ordered or sorted(self.latencies)
+        return ordered[max(0, math.ceil(len(ordered) * percent / 100) - 1)]
+
+    def report(self):
+        if not self.latencies:
+            return 'no moves'
+        ordered = sorted(self.latencies)
+        mean = sum(ordered) / len(ordered)
+        return (f'moves: {len(ordered)}  mean: {mean * 1000:.2f}ms  p50: {self.percentile(50, ordered) * 1000:.2f}ms  '
+                f'p90: {self.percentile(90, ordered) * 1000:.2f}ms  p99: {self.percentile(99, ordered) * 1000:.2f}ms  '
+                f'max: {ordered[-1] * 1000:.2f}ms')
+
+
+class Bot:
+    """One running bot process, with a thread that reads its answers so they can be waited for with a time limit"""
+    def __init__(self, name, command, timeout):
+        self.name = name
+        self.command = command
+        self.timeout = timeout
+        self.latency = LatencyStats()
+        self.process = None
+        self.lines = None
+        self.starting = False
+
+    def start(self):
+        self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+                                        bufsize=1)
+        self.lines = queue.Queue()
+        self.starting = True
+        threading.Thread(target=self._read, args=(self.process.stdout, self.lines), daemon=True).start()
+
+    @staticmethod
+    def _read(stdout, lines):
+        for line in stdout:
+            lines.put(line)
+        lines.put(None)
+
+    def send(self, message):
+        try:
+            self.process.stdin.write(json.dumps(message) + '\n')
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError, ValueError):
+            raise BotError(self.name, CRASH, f'{self.name} is not running') from None
+
+    def discard_unasked(self):
+        """Throws away every line the bot wrote that has not been read, leaving the end of its output if it exited"""
+        while True:
+            try:
+                line = self.lines.get_nowait()
+            except queue.Empty:
+                return
+            if line is None:
+                self.lines.put(None)
+                return
+
+    def ask(self, message):
+        """Sends a message and waits for the answer, timing it
+
+        Lines left over from earlier questions are thrown away first, so they cannot be taken for this answer. The
+        first answer after the bot starts may take up to STARTUP_TIMEOUT, since it includes the bot starting up, and is
+        left out of the latency statistics.
+        """
+        self.discard_unasked()
+        self.send(message)
+        timeout = max(self.timeout, STARTUP_TIMEOUT) if self.starting else self.timeout
+        start = time.perf_counter()
+        try:
+            line = self.lines.get(timeout=timeout)
+        except queue.Empty:
+            raise BotError(self.name, TIMEOUT, f'{self.name} took longer than {timeout}s to answer') from None
+        if not self.starting:
+            self.latency.add(time.perf_counter() - start)
+        self.starting = False
+        if line is None:
+            raise BotError(self.name, CRASH, f'{self.name} exited')
+        try:
+            answer = json.loads(line)
+        except ValueError:
+            raise BotError(self.name, INVALID,
+                           f'{self.name} answered with something that is not JSON: {line.strip()!r}') from None
+        if not isinstance(answer, dict):
+            raise BotError(self.name, INVALID, f'{self.name} answered with {line.strip()!r} instead of an object')
+        return answer
+
+    def restart(self):
+        self.stop(quit_message=False)
+        self.start()
+
+    def stop(self, quit_message=True):
+        if self.process is None:
+            return
+        if quit_message and self.process.poll() is None:
+            try:
+                self.send({'type': 'quit'})
+            except BotError:
+                pass
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.process = None
+
+
+def read_placement(answer):
+    orientation = str(answer.get('orientation', '')).lower()
+    if orientation and 'horizontally'.startswith(orientation):
+        orientation = 'horizontal'
+    elif orientation and 'vertically'.startswith(orientation):
+        orientation = 'vertical'
+    else:
+        return None
+    row, col = answer.get('row'), answer.get('col')
+    if type(row) is not int or type(col) is not int:
+        return None
+    return row, col, orientation
+
+
+def read_shot(answer):
+    row, col = answer.get('row'), answer.get('col')
+    if type(row) is not int or type(col) is not int:
+        return None
+    return row, col
+
+
+class RefereeStats:
+    def __init__(self, names, commands):
+        self.names = names
+        self.commands = commands
+        self.wins = {name: 0 for name in names}
+        self.losses = {name: {} for name in names}
+        self.latency = {name: LatencyStats() for name in names}
+        self.shots = 0
+        self.games = 0
+
+    def add(self, winner, loser, reason, shots):
+        self.games += 1
+        self.shots += shots
+        self.wins[winner] += 1
+        self.losses[loser][reason] = self.losses[loser].get(reason, 0) + 1
+
+    def report(self):
+        lines = [f'games: {self.games}  mean shots per game: {self.shots / self.games if self.games else 0:.1f}']
+        for name, command in zip(self.names, self.commands):
+            losses = self.losses[name]
+            reasons = ', '.join(f'{"sunk" if reason == WIN else reason}: {count}'
+                                for reason, count in sorted(losses.items()))
+            lines.append(f'{name} ({" ".join(command)}): {self.wins[name]} wins, {sum(losses.values())} losses'
+                         + (f' ({reasons})' if reasons else ''))
+            lines.append(f'    {self.latency[name].report()}')
+        return '\n'.join(lines)
+
+
+class Referee:
+    """Plays many games between two bot programs, keeping one running pair of bots per worker
+
+    Games run on a thread pool, since all a worker does is wait on its bots, and every worker owns a pair of bot
+    processes that it reuses game after game. The bots take turns firing first.
+    """
+    def __init__(self, rows, columns, ship_dict, commands, move_timeout=1.0, workers=1):
+        self.rows = rows
+        self.columns = columns
+        self.ship_dict = dict(sorted(ship_dict.items(), key=lambda item: item[0]))
+        self.commands = commands
+        self.names = [f'bot{number}' for number in range(1, len(commands) + 1)]
+        self.move_timeout = move_timeout
+        self.workers = workers
+
+    def run(self, games):
+        """Plays the given number of games and returns their RefereeStats"""
+        stats = RefereeStats(self.names, self.commands)
+        pairs = queue.Queue()
+        started = []
+        try:
+            for worker in range(self.workers):
+                pair = [Bot(name, command, self.move_timeout) for name, command in zip(self.names, self.commands)]
+                started.append(pair)
+                for bot in pair:
+                    bot.start()
+                pairs.put(pair)
+
+            def play(game):
+                pair = pairs.get()
+                try:
+                    return self.play_game(game, pair)
+                finally:
+                    pairs.put(pair)
+
+            with ThreadPoolExecutor(self.workers) as executor:
+                for result in executor.map(play, range(games)):
+                    stats.add(*result)
+        finally:
+            for pair in started:
+                for bot in pair:
+                    bot.stop()
+                    stats.latency[bot.name].merge(bot.latency)
+        return stats
+
+    def play_game(self, game, pair):
+        """Plays one game between a pair of bots
+            Parameters:
+                game (int): the number of the game, which decides who fires first
+                pair (list[Bot]): the bots playing
+            Returns:
+                winner (str): the name of the winning bot
+                loser (str): the name of the losing bot
+                reason (str): WIN, TIMEOUT, CRASH or INVALID, why the loser lost
+                shots (int): how many shots were fired
+        """
+        bots = pair if game % 2 == 0 else pair[::-1]
+        engine = GameEngine(self.rows, self.columns, self.ship_dict, [bot.name for bot in bots])
+        by_name = {bot.name: bot for bot in bots}
+        try:
+            for bot, opponent in (bots, bots[::-1]):
+                bot.send({'type': 'start', 'game': game, 'rows': self.rows, 'columns': self.columns,
+                          'ships': self.ship_dict, 'you': bot.name, 'opponent': opponent.name})
+            for bot in bots:
+                self._place(engine, bot)
+            while engine.winner is None:
+                bot = by_name[engine.current_player]
+                shot = read_shot(bot.ask({'type': 'fire'}))
+                if shot is None:
+                    raise BotError(bot.name, INVALID, f'{bot.name} did not answer with a row and col')
+                try:
+                    result = engine.fire(*shot)
+                except ShotError as error:
+                    raise BotError(bot.name, INVALID, f'{bot.name} fired at {shot}: {error}') from None
+                message = {'type': 'result', 'player': bot.name, 'row': result.row, 'col': result.col,
+                           'outcome': result.outcome, 'letter': result.letter}
+                for receiver in bots:
+                    receiver.send(message)
+            winner, reason = engine.winner, WIN
+            loser = engine.opponent
+        except BotError as error:
+            loser = error.name
+            winner = next(bot.name for bot in bots if bot.name != loser)
+            reason = error.reason
+            by_name[loser].restart()
+        for bot in bots:
+            try:
+                bot.send({'type': 'end', 'winner': winner, 'reason': reason})
+            except BotError:
+                bot.restart()
+        return winner, loser, reason, len(engine.history)
+
+    def _place(self, engine, bot):
+        for letter, size in self.ship_dict.items():
+            placement = read_placement(bot.ask({'type': 'place', 'letter': letter, 'size': size}))
+            if placement is None:
+                raise BotError(bot.name, INVALID, f'{bot.name} did not answer with an orientation, row and col')
+            try:
+                engine.place_ship(bot.name, letter, *placement)
+            except PlacementError as error:
+                raise BotError(bot.name, INVALID, f'{bot.name} placed {letter} at {placement}: {error}') from None
+
+
+def run_bot(strategy, stdin, stdout, seed=None):
+    """Plays as a bot over a pair of text streams, placing ships at random and firing with a built-in strategy
+
+    This is what python -m battleship bot runs, and it doubles as an example of the protocol.
+    """
+    rng = random.Random(seed)
+    name = shooter = placements = None
+    for line in stdin:
+        message = json.loads(line)
+        kind = message['type']
+        if kind == 'start':
+            name = message['you']
+            rows, columns, ship_dict = message['rows'], message['columns'], message['ships']
+            shooter = make_strategy(strategy, rows, columns, ship_dict, rng)
+            placements = random_fleet(rows, columns, ship_dict, rng)
+        elif kind == 'place':
+            row, col, orientation = placements[message['letter']]
+            stdout.write(json.dumps({'orientation': orientation, 'row': row, 'col': col}) + '\n')
+        elif kind == 'fire':
+            row, col = shooter.next_shot()
+            stdout.write(json.dumps({'row': row, 'col': col}) + '\n')
+        elif kind == 'result' and message['player'] == name:
+            shooter.record(ShotResult(name, None, message['row'], message['col'], message['outcome'],
+                                      message['letter']))
+        elif kind == 'quit':
+            return
+        stdout.flush()
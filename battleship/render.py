@@ -0,0 +1,122 @@
+import shutil
+import sys
+
+from battleship.instrument import RENDER, clock
+
+BUFFERED = 'buffered'
+ANSI = 'ansi'
+QUIET = 'quiet'
+MODES = (BUFFERED, ANSI, QUIET)
+
+
+def board_lines(board, top=0, left=0, height=None, width=None):
+    """Lays a board out as text, one string per line, the same way display_board always has
+        Parameters:
+            board (Board): a battleship board
+            top (int): the first row to show
+            left (int): the first column to show
+            height (int): how many rows to show, all of them if not given
+            width (int): how many columns to show, all of them if not given
+        Returns:
+            lines (list[str]): the column header followed by one line per row
+    """
+    rows = len(board)
+    columns = len(board[0])
+    bottom = rows if height is None else min(rows, top + height)
+    right = columns if width is None else min(columns, left + width)
+    lines = [' '.join([' ', *map(str, range(left, right))])]
+    for row in range(top, bottom):
+        lines.append(' '.join([str(row), *board[row][left:right]]))
+    return lines
+
+
+def render_board(board, top=0, left=0, height=None, width=None):
+    return '\n'.join(board_lines(board, top, left, height, width)) + '\n'
+
+
+class Renderer:
+    """Draws the boards of a turn as one frame with a single write
+
+    In buffered mode every frame is written in full. In ANSI mode the frame is drawn once at the top of the screen, the
+    lines under it become a scrolling region for prompts and messages, and later frames with the same layout only move
+    the cursor to the cells that changed and rewrite those, which is usually one or two cells a shot. Quiet mode draws
+    nothing. With a viewport of (rows, columns), or 'auto' for the terminal size, boards that do not fit are cut down
+    to a window around the focus cell. Given Instruments, every frame drawn is timed as the render phase.
+    """
+    def __init__(self, mode=BUFFERED, stream=None, viewport=None, instruments=None):
+        if mode not in MODES:
+            raise ValueError(f'unknown render mode {mode!r}, expected one of {", ".join(MODES)}')
+        self.mode = mode
+        self.stream = stream or sys.stdout
+        self.viewport = viewport
+        self.instruments = instruments
+        self.layout = None
+        self.screen = None
+
+    def _window(self, board, focus):
+        if self.viewport is None:
+            return 0, 0, None, None
+        if self.viewport == 'auto':
+            size = shutil.get_terminal_size()
+            label = len(str(len(board) - 1)) + 1
+            height, width = max(1, size.lines - 4), max(1, (size.columns - label) // 2)
+        else:
+            height, width = self.viewport
+        rows, columns = len(board), len(board[0])
+        if rows <= height and columns <= width:
+            return 0, 0, None, None
+        row, col = focus or (0, 0)
+        top = min(max(0, row - height // 2), max(0, rows - height))
+        left = min(max(0, col - width // 2), max(0, columns - width))
+        return top, left, height, width
+
+    def frame(self, boards, focus=None):
+        """Draws one frame
+            Parameters:
+                boards (list[tuple[str, Board]]): each board with the title printed above it
+                focus (tuple[int, int]): the (row, col) to keep inside the viewport, such as the last shot
+            Returns: None
+        """
+        if self.mode == QUIET:
+            return
+        start = clock() if self.instruments is not None else 0
+        lines = []
+        for title, board in boards:
+            lines.append(title)
+            lines.extend(board_lines(board, *self._window(board, focus)))
+        if self.mode == BUFFERED:
+            self.stream.write('\n'.join(lines) + '\n')
+        else:
+            self._draw_changes(lines)
+        self.stream.flush()
+        if self.instruments is not None:
+            self.instruments.record(RENDER, start)
+
+    def _draw_changes(self, lines):
+        layout = [len(line) for line in lines]
+        if layout != self.layout:
+            self.layout = layout
+            self.screen = lines
+            height = shutil.get_terminal_size().lines
+            scroll_top = min(len(lines) + 2, height)
+            self.stream.write('\x1b[r\x1b[H\x1b[2J' + '\n'.join(lines) + '\n')
+            self.stream.write(f'\x1b[{scroll_top};{height}r\x1b[{scroll_top};1H')
+            return
+        parts = ['\x1b7']
+        for y, (old, new) in enumerate(zip(self.screen, lines)):
+            if old == new:
+                continue
+            for x, (old_char, new_char) in enumerate(zip(old, new)):
+                if old_char != new_char:
+                    parts.append(f'\x1b[{y + 1};{x + 1}H{new_char}')
+        self.screen = lines
+        parts.append('\x1b8')
+        self.stream.write(''.join(parts))
+
+    def close(self):
+        """Gives the whole terminal back to normal scrolling after ANSI frames"""
+        if self.mode == ANSI and self.layout is not None:
+            self.stream.write('\x1b[r')
+            self.stream.flush()
+        self.layout = None
+        self.screen = None
@@ -0,0 +1,321 @@
+"""An asyncio TCP server that hosts many games at once over a line-based text protocol
+
+Every line the server sends starts with a word saying what it is:
+
+    BATTLESHIP <rows> <columns> <letter>:<size> ...   the game being played, sent first
+    NAME                                              asks for a name, one word
+    WAIT                                              the player is in the lobby waiting for an opponent
+    MATCH <opponent> <first|second>                   paired up, and whether the player fires first
+    PLACE <letter> <size>                             asks where a ship goes
+    FIRE                                              asks where to fire
+    SHOT <player> <row> <col> <miss|hit|sunk|win> [<letter>]
+                                                      the result of a shot, sent to both players
+    WINNER <player> <win|timeout|disconnect>          the game is over
+    ERROR <message>                                   the last answer was not valid, the question is asked again
+
+A ship is placed with an orientation followed by row col, like 'h 0 0' or 'vertical 3 4', where the orientation is
+any start of horizontally or vertically as in main.py, or with 'random' to place every remaining ship at random. A
+shot is row col, like '3 4'. Answers may be sent ahead of their question. A player who takes longer than the turn
+timeout to get a shot accepted, or to get all their ships placed, or to read what the server sent, loses the game.
+"""
+import asyncio
+import collections
+import random
+
+from battleship.engine import WIN, GameEngine, PlacementError, ShotError
+from battleship.placement import random_fleet
+
+LINE_LIMIT = 1024
+BACKLOG = 1024
+WRITE_BUFFER = 16 * 1024
+
+
+class Disconnected(Exception):
+    pass
+
+
+class Client:
+    """One connection, with a deadline on everything it has to do"""
+    __slots__ = ('reader', 'writer', 'timeout', 'name')
+
+    def __init__(self, reader, writer, timeout):
+        self.reader = reader
+        self.writer = writer
+        self.timeout = timeout
+        self.name = None
+
+    def deadline(self):
+        """Returns the loop time by which everything the client has to do from now on must be done"""
+        return asyncio.get_running_loop().time() + self.timeout
+
+    def time_left(self, deadline):
+        if deadline is None:
+            return self.timeout
+        return max(deadline - asyncio.get_running_loop().time(), 0)
+
+    async def send(self, line, deadline=None):
+        """Writes a line, waiting at most timeout, or until deadline if one is given, for a slow reader to make room
+        for it, and raising TimeoutError if the deadline has already passed"""
+        if self.writer.is_closing():
+            raise Disconnected
+        timeout = self.time_left(deadline)
+        if not timeout:
+            raise asyncio.TimeoutError
+        self.writer.write(line.encode('utf-8') + b'\n')
+        try:
+            await asyncio.wait_for(self.writer.drain(), timeout)
+        except (ConnectionError, asyncio.TimeoutError):
+            raise Disconnected from None
+
+    async def ask(self, question, deadline=None):
+        """Sends a question and returns the next line that comes back, raising TimeoutError if none does within
+        timeout, or by deadline if one is given"""
+        await self.send(question, deadline)
+        try:
+            line = await asyncio.wait_for(self.reader.readline(), self.time_left(deadline))
+        except (ConnectionError, ValueError):
+            raise Disconnected from None
+        if not line:
+            raise Disconnected
+        return line.decode('utf-8', 'replace').strip()
+
+    @property
+    def gone(self):
+        return self.writer.is_closing() or self.reader.at_eof()
+
+    def close(self):
+        self.writer.close()
+
+
+class Match:
+    """The state of one game on the server: its engine and the client of each player"""
+    __slots__ = ('engine', 'clients')
+
+    def __init__(self, engine, clients):
+        self.engine = engine
+        self.clients = clients
+
+
+def parse_placement(line):
+    """Reads 'orientation row col' the way main.py reads them, returning None for anything else"""
+    words = line.split()
+    if len(words) != 3 or not words[0]:
+        return None
+    word = words[0].lower()
+    if 'horizontally'.startswith(word):
+        orientation = 'horizontal'
+    elif 'vertically'.startswith(word):
+        orientation = 'vertical'
+    else:
+        return None
+    try:
+        return int(words[1]), int(words[2]), orientation
+    except ValueError:
+        return None
+
+
+def parse_shot(line):
+    """Reads 'row col' the way valid_fire does, returning None for anything else"""
+    words = line.split()
+    try:
+        return int(words[0]), int(words[1])
+    except (ValueError, IndexError):
+        return None
+
+
+class GameServer:
+    """Pairs up clients from a lobby as they connect and plays each pair's game in its own task
+
+    A match only keeps its GameEngine and its two clients, and engines use bytearray boards by default, a byte per
+    cell, so tens of thousands of idle matches fit in memory. Every write waits for the client to drain its buffer,
+    which is kept small, so a client that stops reading holds up nothing but its own match and loses it once the turn
+    timeout runs out. The turn timeout covers a whole turn, or all of a player's placements, however many answers the
+    server has to turn down in it.
+    """
+    def __init__(self, rows, columns, ship_dict, turn_timeout=60.0, backend='bytearray', rng=None):
+        self.rows = rows
+        self.columns = columns
+        self.ship_dict = dict(sorted(ship_dict.items(), key=lambda item: item[0]))
+        self.turn_timeout = turn_timeout
+        self.backend = backend
+        self.rng = rng or random.Random()
+        self.lobby = collections.deque()
+        self.matches = set()
+        self.finished = 0
+        self.server = None
+
+    async def start(self, host='127.0.0.1', port=8765):
+        self.server = await asyncio.start_server(self.handle, host, port, limit=LINE_LIMIT, backlog=BACKLOG)
+        return self.server
+
+    async def serve_forever(self, host='127.0.0.1', port=8765):
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def close(self):
+        """Stops accepting clients and sends the ones waiting in the lobby away"""
+        if self.server is not None:
+            self.server.close()
+        while self.lobby:
+            client, done = self.lobby.popleft()
+            client.close()
+            if not done.done():
+                done.set_result(None)
+        if self.server is not None:
+            await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        """Greets a new client, asks its name and either leaves it in the lobby or starts a match with it"""
+        writer.transport.set_write_buffer_limits(high=WRITE_BUFFER)
+        client = Client(reader, writer, self.turn_timeout)
+        try:
+            deadline = client.deadline()
+            ships = ' '.join(f'{letter}:{size}' for letter, size in self.ship_dict.items())
+            await client.send(f'BATTLESHIP {self.rows} {self.columns} {ships}', deadline)
+            while client.name is None:
+                name = await client.ask('NAME', deadline)
+                if len(name.split()) == 1 and len(name) <= 32:
+                    client.name = name
+                else:
+                    await client.send('ERROR a name is one word of at most 32 characters', deadline)
+            while self.lobby and self.lobby[0][0].gone:
+                opponent, done = self.lobby.popleft()
+                opponent.close()
+                if not done.done():
+                    done.set_result(None)
+            if not self.lobby:
+                done = asyncio.get_running_loop().create_future()
+                self.lobby.append((client, done))
+                await client.send('WAIT')
+                await done
+                return
+            opponent, done = self.lobby.popleft()
+        except (Disconnected, asyncio.TimeoutError, asyncio.CancelledError):
+            # a cancelled handler is one the loop is shutting down, which has nothing left to report
+            client.close()
+            return
+        try:
+            await self.play(opponent, client)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            if not done.done():
+                done.set_result(None)
+
+    def _pair_names(self, first, second):
+        if first.name == second.name:
+            return first.name, f'{second.name}-2'
+        return first.name, second.name
+
+    async def play(self, first, second):
+        """Plays one match between two clients from start to finish and closes both connections"""
+        players = self._pair_names(first, second)
+        match = Match(GameEngine(self.rows, self.columns, self.ship_dict, players, self.backend),
+                      dict(zip(players, (first, second))))
+        self.matches.add(match)
+        try:
+            winner, reason = await self._run(match)
+            await self._broadcast(match, f'WINNER {winner} {reason}')
+        finally:
+            self.matches.discard(match)
+            self.finished += 1
+            for client in match.clients.values():
+                client.close()
+
+    async def _broadcast(self, match, line):
+        for client in match.clients.values():
+            try:
+                await client.send(line)
+            except Disconnected:
+                pass
+
+    async def _run(self, match):
+        engine = match.engine
+        first, second = engine.players
+        try:
+            await match.clients[first].send(f'MATCH {second} first')
+        except Disconnected:
+            return second, 'disconnect'
+        try:
+            await match.clients[second].send(f'MATCH {first} second')
+        except Disconnected:
+            return first, 'disconnect'
+        forfeit = await self._place_fleets(match)
+        if forfeit is not None:
+            return forfeit
+        while engine.winner is None:
+            player = engine.current_player
+            try:
+                result = await self._shoot(match, player)
+            except (Disconnected, asyncio.TimeoutError) as error:
+                return engine.opponent, _reason(error)
+            letter = f' {result.letter}' if result.letter is not None else ''
+            await self._broadcast(match, f'SHOT {player} {result.row} {result.col} {result.outcome}{letter}')
+        return engine.winner, WIN
+
+    async def _place_fleets(self, match):
+        """Lets both players place their ships at the same time, returning the winner and reason if one of them fails"""
+        players = match.engine.players
+        placing = [asyncio.ensure_future(self._place(match, player)) for player in players]
+        try:
+            await asyncio.wait(placing, return_when=asyncio.FIRST_EXCEPTION)
+        finally:
+            for task in placing:
+                task.cancel()
+        for opponent, task in zip(reversed(players), placing):
+            if task.done() and not task.cancelled() and task.exception() is not None:
+                return opponent, _reason(task.exception())
+        return None
+
+    async def _place(self, match, player):
+        """Asks a player where every ship goes, all within one turn timeout"""
+        engine = match.engine
+        client = match.clients[player]
+        deadline = client.deadline()
+        for letter, size in engine.ship_dict.items():
+            while letter not in engine.fleet(player):
+                line = await client.ask(f'PLACE {letter} {size}', deadline)
+                if line.lower() == 'random':
+                    if self._place_rest(engine, player):
+                        return
+                    await client.send('ERROR the remaining ships do not fit anywhere at random', deadline)
+                    continue
+                placement = parse_placement(line)
+                if placement is None:
+                    await client.send('ERROR a ship is placed as orientation row col, like h 0 0', deadline)
+                    continue
+                try:
+                    engine.place_ship(player, letter, *placement)
+                except PlacementError as error:
+                    await client.send(f'ERROR {error}', deadline)
+
+    def _place_rest(self, engine, player):
+        """Places every ship a player has not placed yet at random around the ones already on the board, if it can"""
+        for attempt in range(100):
+            placements = random_fleet(self.rows, self.columns, self.ship_dict, self.rng)
+            missing = {letter: spot for letter, spot in placements.items() if letter not in engine.fleet(player)}
+            if all(engine.can_place(player, self.ship_dict[letter], *spot) for letter, spot in missing.items()):
+                for letter, spot in missing.items():
+                    engine.place_ship(player, letter, *spot)
+                return True
+        return False
+
+    async def _shoot(self, match, player):
+        """Asks a player where to fire until they name a valid shot, all within one turn timeout"""
+        engine = match.engine
+        client = match.clients[player]
+        deadline = client.deadline()
+        while True:
+            shot = parse_shot(await client.ask('FIRE', deadline))
+            if shot is None:
+                await client.send('ERROR a shot is row col, like 3 4', deadline)
+                continue
+            try:
+                return engine.fire(*shot)
+            except ShotError as error:
+                await client.send(f'ERROR {error}', deadline)
+
+
+def _reason(error):
+    return 'timeout' if isinstance(error, asyncio.TimeoutError) else 'disconnect'
@@ -0,0 +1,298 @@
+"""Live game state in shared memory, for AIs, spectators and recorders running in other processes
+
+GameEngine.share puts a SharedGameState in a multiprocessing.shared_memory block and keeps it up to date as ships
+are placed and shots are fired, changing only the bytes each move touches. Other processes attach a
+SharedGameReader by the block's name and read it in place, without anything being pickled. All integers are little
+endian and every section starts on an 8-byte boundary:
+
+    header      48 bytes   b'BSGS', version (u16), players (u16), rows (u32), columns (u32), ships (u32),
+                           metadata length (u32), sequence (u64), shots (u64), turn (i16), winner (i16, -1 for
+                           none), 4 bytes of padding
+    metadata               UTF-8 JSON: {"players": [names], "ships": [[letter, size], ...]} with ships sorted by letter
+    boards      u8         every player's placement board, players * rows * columns cells in row order, holding
+                           0 for empty, 1 for a miss, 2 for a hit and 3 + i for the i-th ship in metadata
+    alive       u32        how many ships each player has afloat
+    remaining   u32        how many cells of each ship are not hit yet, players * ships of them
+    shot cells  u32        every shot so far as row * columns + col, room for players * rows * columns of them
+    shot sides  u16        the shooter * 256 + the target of every shot
+
+The sequence is a seqlock: the writer makes it odd before changing anything and even again once it is done. A
+reader reads the sequence, reads what it wants, and reads the sequence again, and what it read is consistent if the
+sequence was even and did not change; otherwise it reads again. There is one writer, the process running the game.
+"""
+import json
+import struct
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+from battleship.byte_board import ByteBoard
+from battleship.firing_view import FiringView
+from battleship.numpy_board import BASE_CELLS, EMPTY, FIRST_SHIP, HIT, MISS
+
+MAGIC = b'BSGS'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIIIIQQhh4x')
+SEQUENCE = 24
+STATE = struct.Struct('<Qhh')
+STATE_OFFSET = 32
+
+
+def _aligned(size):
+    return (size + 7) & ~7
+
+
+class Layout:
+    """Where each section of the shared block starts, worked out from the game's size"""
+    def __init__(self, players, rows, columns, ships, metadata_size):
+        self.players = players
+        self.rows = rows
+        self.columns = columns
+        self.ships = ships
+        self.area = rows * columns
+        self.capacity = players * self.area
+        self.metadata = HEADER.size
+        self.boards = self.metadata + _aligned(metadata_size)
+        self.alive = self.boards + _aligned(players * self.area)
+        self.remaining = self.alive + _aligned(4 * players)
+        self.shot_cells = self.remaining + _aligned(4 * players * ships)
+        self.shot_sides = self.shot_cells + _aligned(4 * self.capacity)
+        self.size = self.shot_sides + _aligned(2 * self.capacity)
+
+    def views(self, buffer):
+        """Slices a block into typed memoryviews of boards, alive, remaining, shot cells and shot sides, followed by
+        every view they were cut from, which all have to be released before the block can be closed"""
+        view = memoryview(buffer)
+        sections = [view[self.boards:self.boards + self.players * self.area],
+                    view[self.alive:self.alive + 4 * self.players],
+                    view[self.remaining:self.remaining + 4 * self.players * self.ships],
+                    view[self.shot_cells:self.shot_cells + 4 * self.capacity],
+                    view[self.shot_sides:self.shot_sides + 2 * self.capacity]]
+        typed = [sections[0]] + [section.cast(code) for section, code in zip(sections[1:], 'IIIH')]
+        return typed + [view] + sections[1:]
+
+
+class SharedGameState:
+    """The writing side of a game's shared state, made and kept up to date by GameEngine.share"""
+    def __init__(self, engine, name=None):
+        letters = list(engine.ship_dict)
+        if len(letters) > 256 - FIRST_SHIP:
+            raise ValueError(f'shared game state holds at most {256 - FIRST_SHIP} different ships')
+        if len(engine.players) > 256:
+            raise ValueError('shared game state holds at most 256 players')
+        metadata = json.dumps({'players': engine.players, 'ships': list(engine.ship_dict.items())}).encode('utf-8')
+        self.layout = Layout(len(engine.players), engine.rows, engine.columns, len(letters), len(metadata))
+        self.memory = shared_memory.SharedMemory(name=name, create=True, size=self.layout.size)
+        self.name = self.memory.name
+        self.codes = {letter: code for code, letter in enumerate(letters, FIRST_SHIP)}
+        self.ship_numbers = {letter: number for number, letter in enumerate(letters)}
+        buffer = self.memory.buf
+        HEADER.pack_into(buffer, 0, MAGIC, VERSION, len(engine.players), engine.rows, engine.columns, len(letters),
+                         len(metadata), 0, 0, 0, -1)
+        buffer[self.layout.metadata:self.layout.metadata + len(metadata)] = metadata
+        self.views = self.layout.views(buffer)
+        self.boards, self.alive, self.remaining, self.shot_cells, self.shot_sides = self.views[:5]
+        self.sequence = 0
+        self.shots = 0
+        self.rewrite(engine)
+
+    def _begin(self):
+        self.sequence += 1
+        struct.pack_into('<Q', self.memory.buf, SEQUENCE, self.sequence)
+
+    def _end(self, engine):
+        winner = engine.index[engine.winner] if engine.winner is not None else -1
+        STATE.pack_into(self.memory.buf, STATE_OFFSET, self.shots, engine.turn, winner)
+        self.sequence += 1
+        struct.pack_into('<Q', self.memory.buf, SEQUENCE, self.sequence)
+
+    def rewrite(self, engine):
+        """Writes the whole game out again, for a new or reset game with no shots fired yet"""
+        self._begin()
+        layout = self.layout
+        self.boards[:] = bytes(len(self.boards))
+        for player_index, player in enumerate(engine.players):
+            board = engine.placement_board(player)
+            start = player_index * layout.area
+            for row in range(layout.rows):
+                for col, letter in enumerate(board[row]):
+                    if letter != '*':
+                        self.boards[start + row * layout.columns + col] = self._code(letter)
+            fleet = engine.fleet(player)
+            self.alive[player_index] = fleet.alive
+            for letter, number in self.ship_numbers.items():
+                ship = fleet.ships.get(letter)
+                self.remaining[player_index * layout.ships + number] = ship.remaining if ship is not None else 0
+        self.shots = 0
+        self._end(engine)
+
+    def _code(self, letter):
+        if letter == 'X':
+            return HIT
+        if letter == 'O':
+            return MISS
+        return self.codes[letter]
+
+    def placed(self, engine, player_index, letter, cells):
+        """Records a ship GameEngine.place_ship just put on the board"""
+        self._begin()
+        layout = self.layout
+        code = self.codes[letter]
+        start = player_index * layout.area
+        for row, col in cells:
+            self.boards[start + row * layout.columns + col] = code
+        self.alive[player_index] = engine.fleet(engine.players[player_index]).alive
+        self.remaining[player_index * layout.ships + self.ship_numbers[letter]] = len(cells)
+        self._end(engine)
+
+    def _shot(self, engine, shooter, target, row, col, ship):
+        layout = self.layout
+        cell = row * layout.columns + col
+        self.boards[target * layout.area + cell] = MISS if ship is None else HIT
+        if ship is not None:
+            self.remaining[target * layout.ships + self.ship_numbers[ship.letter]] = ship.remaining
+            self.alive[target] = engine.fleet(engine.players[target]).alive
+        self.shot_cells[self.shots] = cell
+        self.shot_sides[self.shots] = shooter << 8 | target
+        self.shots += 1
+
+    def shot(self, engine, shooter, target, row, col, ship):
+        """Records one shot, with ship being what Fleet.hit returned for it"""
+        self._begin()
+        self._shot(engine, shooter, target, row, col, ship)
+        self._end(engine)
+
+    def salvo(self, engine, shooter, target, shots):
+        """Records every shot of a salvo as one change, given as (row, col, ship)"""
+        self._begin()
+        for row, col, ship in shots:
+            self._shot(engine, shooter, target, row, col, ship)
+        self._end(engine)
+
+    def undone(self, engine, target, row, col, ship):
+        """Takes back the latest shot, after GameEngine.undo_shot has"""
+        self._begin()
+        layout = self.layout
+        self.boards[target * layout.area + row * layout.columns + col] = (
+            EMPTY if ship is None else self.codes[ship.letter])
+        if ship is not None:
+            self.remaining[target * layout.ships + self.ship_numbers[ship.letter]] = ship.remaining
+            self.alive[target] = engine.fleet(engine.players[target]).alive
+        self.shots -= 1
+        self._end(engine)
+
+    def close(self):
+        """Stops sharing the game: the block goes away once every reader has closed it too"""
+        for view in self.views:
+            view.release()
+        self.memory.close()
+        self.memory.unlink()
+
+
+def _attach(name):
+    """Opens an existing block without this process's resource tracker deleting it when the process exits"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    # before Python 3.13 attaching always registers the block, and unregistering it afterwards would also drop the
+    # writer's own registration when both are in one process, so it is kept from registering at all
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class GameSnapshot:
+    """A consistent copy of a shared game at one sequence number"""
+    def __init__(self, reader, sequence, shots, turn, winner, boards, alive, remaining, history):
+        self.sequence = sequence
+        self.rows = reader.rows
+        self.columns = reader.columns
+        self.players = reader.players
+        self.ship_dict = reader.ship_dict
+        self.shots = shots
+        self.current_player = reader.players[turn]
+        self.winner = reader.players[winner] if winner >= 0 else None
+        self.boards = boards
+        self.alive = dict(zip(reader.players, alive))
+        ships = len(reader.ship_dict)
+        self.remaining = {player: dict(zip(reader.ship_dict, remaining[index * ships:(index + 1) * ships]))
+                          for index, player in enumerate(reader.players)}
+        self.history = history
+
+    def placement_board(self, player):
+        """The player's placement board, ships and all, as a ByteBoard"""
+        return ByteBoard.from_cells(self.rows, self.columns, self.boards[self.players.index(player)],
+                                    list(BASE_CELLS) + list(self.ship_dict))
+
+    def firing_board(self, target):
+        """The shots fired at target, the way their opponents see them"""
+        return FiringView(self.placement_board(target))
+
+
+class SharedGameReader:
+    """The reading side of a game's shared state, attached by name from any process on the machine"""
+    def __init__(self, name):
+        self.memory = _attach(name)
+        buffer = self.memory.buf
+        magic, version, players, rows, columns, ships, metadata_size = HEADER.unpack_from(buffer, 0)[:7]
+        if magic != MAGIC or version != VERSION:
+            self.memory.close()
+            raise ValueError(f'{name} does not hold a version {VERSION} shared game')
+        self.layout = Layout(players, rows, columns, ships, metadata_size)
+        metadata = json.loads(bytes(buffer[HEADER.size:HEADER.size + metadata_size]).decode('utf-8'))
+        self.rows = rows
+        self.columns = columns
+        self.players = metadata['players']
+        self.ship_dict = dict(metadata['ships'])
+        self.views = self.layout.views(buffer)
+        self.boards, self.alive, self.remaining, self.shot_cells, self.shot_sides = self.views[:5]
+
+    @property
+    def sequence(self):
+        return struct.unpack_from('<Q', self.memory.buf, SEQUENCE)[0]
+
+    def read(self, function, pause=0.0):
+        """Calls function(reader, shots, turn, winner) on the live memory until it runs while nothing changes
+
+        function reads the boards, alive, remaining, shot_cells and shot_sides memoryviews in place, so nothing is
+        copied unless it copies it. What it returns is only kept if the writer did not change anything meanwhile,
+        otherwise it is called again, so it should not have side effects.
+            Parameters:
+                function (callable): reads the state and returns what it found
+                pause (float): seconds to sleep before trying again while the writer is in the middle of a change
+            Returns:
+                sequence (int): the sequence number the result is consistent with
+                result: whatever function returned
+        """
+        buffer = self.memory.buf
+        while True:
+            before = struct.unpack_from('<Q', buffer, SEQUENCE)[0]
+            if before & 1:
+                time.sleep(pause)
+                continue
+            shots, turn, winner = STATE.unpack_from(buffer, STATE_OFFSET)
+            result = function(self, shots, turn, winner)
+            if struct.unpack_from('<Q', buffer, SEQUENCE)[0] == before:
+                return before, result
+            time.sleep(pause)
+
+    def snapshot(self):
+        """Copies the whole state out at one consistent sequence number"""
+        area = self.layout.area
+
+        def copy(reader, shots, turn, winner):
+            boards = [bytes(self.boards[index * area:(index + 1) * area]) for index in range(len(self.players))]
+            history = [(sides >> 8, sides & 0xff, *divmod(cell, self.columns))
+                       for cell, sides in zip(self.shot_cells[:shots], self.shot_sides[:shots])]
+            return shots, turn, winner, boards, self.alive.tolist(), self.remaining.tolist(), history
+
+        sequence, state = self.read(copy)
+        return GameSnapshot(self, sequence, *state)
+
+    def close(self):
+        for view in self.views:
+            view.release()
+        self.memory.close()
@@ -0,0 +1,70 @@
+class ShotHistory:
+    """Remembers which cells a player has already fired at
+
+    Shots are stored by parsed (row, col) in a bytearray with one byte per cell, so the duplicate check is a single
+    index no matter how the coordinate was typed or how long the game has gone on.
+    """
+    def __init__(self, rows, columns):
+        self.rows = rows
+        self.columns = columns
+        self.fired = bytearray(rows * columns)
+        self.count = 0
+
+    def add(self, row, col):
+        """Marks a cell as fired at
+            Parameters:
+                row (int): the row that was fired at
+                col (int): the column that was fired at
+            Returns:
+                bool: True if the cell had not been fired at before, False otherwise
+        """
+        index = row * self.columns + col
+        if self.fired[index]:
+            return False
+        self.fired[index] = 1
+        self.count += 1
+        return True
+
+    def remove(self, row, col):
+        index = row * self.columns + col
+        if self.fired[index]:
+            self.fired[index] = 0
+            self.count -= 1
+
+    def __contains__(self, coord):
+        row, col = coord
+        return self.fired[row * self.columns + col] == 1
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.fired = bytearray(self.rows * self.columns)
+        self.count = 0
+
+
+class SparseShotHistory:
+    """Remembers which cells a player has already fired at in a set, so memory grows with the shots and not the board"""
+    def __init__(self, rows, columns):
+        self.rows = rows
+        self.columns = columns
+        self.fired = set()
+
+    def add(self, row, col):
+        """Marks a cell as fired at, returning False if it had been fired at before"""
+        if (row, col) in self.fired:
+            return False
+        self.fired.add((row, col))
+        return True
+
+    def remove(self, row, col):
+        self.fired.discard((row, col))
+
+    def __contains__(self, coord):
+        return coord in self.fired
+
+    def __len__(self):
+        return len(self.fired)
+
+    def clear(self):
+        self.fired = set()
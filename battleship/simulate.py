@@ -0,0 +1,140 @@
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from battleship.engine import ShotResult, WIN, shot_outcome
+from battleship.fleet import Fleet, ship_cells
+from battleship.placement import random_fleet
+from battleship.strategies import STRATEGIES, make_strategy
+
+
+def play_fleet(rows, columns, ship_dict, placements, strategy, rng):
+    """Lets a strategy fire at a given fleet until every ship is sunk
+        Parameters:
+            rows (int): the number of rows of the board
+            columns (int): the number of columns of the board
+            ship_dict (dict): each ship's letter mapped to its size
+            placements (dict): each ship's letter mapped to its (row, col, orientation)
+            strategy (str): the name of the strategy doing the firing
+            rng (random.Random): where the randomness for the strategy comes from
+        Returns:
+            shots (int): how many shots it took to sink the whole fleet
+    """
+    fleet = Fleet()
+    for letter, (row, col, orientation) in placements.items():
+        fleet.add(letter, ship_cells(row, col, ship_dict[letter], orientation))
+    shooter = make_strategy(strategy, rows, columns, ship_dict, rng)
+    for shots in range(1, rows * columns + 1):
+        row, col = shooter.next_shot()
+        ship = fleet.hit(row, col)
+        outcome = shot_outcome(fleet, ship)
+        shooter.record(ShotResult('shooter', 'target', row, col, outcome, ship.letter if ship else None))
+        if outcome == WIN:
+            return shots
+    raise RuntimeError(f'strategy {strategy!r} fired at every cell without sinking the fleet')
+
+
+def play_game(rows, columns, ship_dict, strategy, rng):
+    """Lets a strategy fire at a random fleet until every ship is sunk, see play_fleet"""
+    return play_fleet(rows, columns, ship_dict, random_fleet(rows, columns, ship_dict, rng), strategy, rng)
+
+
+def run_chunk(rows, columns, ship_dict, strategy, seed, chunk, games):
+    """Plays one chunk of games in a worker and sends back only the histogram of shots to win"""
+    rng = random.Random(f'{seed}:{chunk}')
+    histogram = {}
+    for game in range(games):
+        shots = play_game(rows, columns, ship_dict, strategy, rng)
+        histogram[shots] = histogram.get(shots, 0) + 1
+    return histogram
+
+
+class SimulationStats:
+    def __init__(self, strategy, seed):
+        self.strategy = strategy
+        self.seed = seed
+        self.histogram = {}
+        self.games = 0
+
+    def add(self, histogram):
+        for shots, count in histogram.items():
+            self.histogram[shots] = self.histogram.get(shots, 0) + count
+            self.games += count
+
+    @property
+    def mean(self):
+        return sum(shots * count for shots, count in self.histogram.items()) / self.games
+
+    @property
+    def stdev(self):
+        mean = self.mean
+        return math.sqrt(sum(count * (shots - mean) ** 2 for shots, count in self.histogram.items()) / self.games)
+
+    def percentile(self, percent):
+        """Returns the smallest shot count that at least percent of the games finished within"""
+        needed = math.ceil(self.games * percent / 100) or 1
+        seen = 0
+        for shots in sorted(self.histogram):
+            seen += self.histogram[shots]
+            if seen >= needed:
+                return shots
+
+    def report(self, bins=20, width=50):
+        """Formats the statistics and a text histogram of shots to win"""
+        low, high = min(self.histogram), max(self.histogram)
+        lines = [
+            f'strategy: {self.strategy}  games: {self.games}  seed: {self.seed}',
+            f'mean: {self.mean:.2f}  stdev: {self.stdev:.2f}  min: {low}  p50: {self.percentile(50)}  '
+            f'p90: {self.percentile(90)}  p99: {self.percentile(99)}  max: {high}',
+            'shots to win:',
+        ]
+        bin_size = max(1, math.ceil((high - low + 1) / bins))
+        counts = {}
+        for shots, count in self.histogram.items():
+            start = low + (shots - low) // bin_size * bin_size
+            counts[start] = counts.get(start, 0) + count
+        most = max(counts.values())
+        for start in range(low, high + 1, bin_size):
+            count = counts.get(start, 0)
+            label = f'{start}-{start + bin_size - 1}' if bin_size > 1 else f'{start}'
+            lines.append(f'{label:>11} | {"#" * round(count / most * width):<{width}} {count}')
+        return '\n'.join(lines)
+
+
+def simulate(rows, columns, ship_dict, strategy='hunt', games=1000, workers=None, chunk_size=None, seed=None):
+    """Plays many games with random fleets across a pool of processes
+        Parameters:
+            rows (int): the number of rows of the board
+            columns (int): the number of columns of the board
+            ship_dict (dict): each ship's letter mapped to its size
+            strategy (str): the name of the strategy doing the firing
+            games (int): how many games to play
+            workers (int): how many processes to use, defaults to one per CPU
+            chunk_size (int): how many games each task plays before sending its histogram back
+            seed (int): makes the run reproducible, a random one is picked if not given
+        Returns:
+            stats (SimulationStats): the combined shots to win of every game
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f'unknown strategy {strategy!r}, expected one of {", ".join(STRATEGIES)}')
+    if games < 1:
+        raise ValueError('games has to be at least 1')
+    workers = workers or os.cpu_count() or 1
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    if chunk_size is None:
+        chunk_size = max(1, min(1000, games // (workers * 8)))
+    chunks = []
+    for chunk, start in enumerate(range(0, games, chunk_size)):
+        chunks.append((rows, columns, ship_dict, strategy, seed, chunk, min(chunk_size, games - start)))
+    stats = SimulationStats(strategy, seed)
+    if workers == 1:
+        for args in chunks:
+            stats.add(run_chunk(*args))
+        return stats
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_chunk, *args) for args in chunks]
+        for future in as_completed(futures):
+            stats.add(future.result())
+    return stats
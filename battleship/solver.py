@@ -0,0 +1,245 @@
+"""Exact endgame search for the shot that leaves the fewest shots to win on average
+
+A position is the set of fleet configurations that still agree with every shot fired so far, each taken to be
+equally likely. A configuration is a (union, masks) pair of integer bitmasks: masks holds the cells of each unsunk
+ship and union is all of them together. Firing at a cell splits the configurations by what the shot would reveal,
+a miss or a hit on one particular ship, and the value of a position is the smallest expected number of shots left
+over every cell it could fire at. Values are kept as totals over the configurations, so the search only ever adds
+integers.
+"""
+import functools
+import math
+import random
+import time
+from collections import OrderedDict
+
+
+class SearchLimit(Exception):
+    pass
+
+
+@functools.lru_cache(maxsize=4096)
+def shots_floor(count, remaining):
+    """The fewest shots, in total, that count configurations can take to win, whatever is fired
+
+    Two configurations can only finish on the same sequence of outcomes if they are the same configuration. With the
+    ships' unhit cells given by remaining, only comb(r + m - 1, m) orders of r hits and m misses end on a hit, times
+    the ways of sharing the hits out between the ships, so no more than that many configurations finish after exactly
+    m misses.
+    """
+    hits = sum(remaining)
+    orders = math.factorial(hits)
+    for left in remaining:
+        orders //= math.factorial(left)
+    total = 0
+    misses = 0
+    while count > 0:
+        finished = min(count, math.comb(hits + misses - 1, misses) * orders if hits else 1)
+        total += finished * (hits + misses)
+        count -= finished
+        misses += 1
+    return total
+
+
+class TranspositionTable:
+    """Remembers solved positions by hash and forgets the least recently used one once it holds size of them"""
+    def __init__(self, size=1 << 18):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lookups = 0
+        self.hits = 0
+
+    def get(self, key):
+        self.lookups += 1
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def __len__(self):
+        return len(self.entries)
+
+
+_popcount = getattr(int, 'bit_count', None) or (lambda bits: bin(bits).count('1'))
+
+
+class EndgameSolver:
+    """Searches endgame positions for the best shot, memoizing them in a TranspositionTable
+
+    Positions are keyed Zobrist style. Every configuration and every (cell, ship) hit gets a random 64-bit number and
+    a position's key is the numbers of its configurations and its hits XORed together, which is all of the shot history
+    that still matters: histories whose misses ruled out the same configurations reach the same position, whatever
+    order the shots came in, and share one entry. A search gives up with SearchLimit after max_nodes positions, which
+    keeps a move to a few tens of milliseconds while leaving the search as reproducible as the rest of a seeded game.
+
+    Within a search the configurations are numbered and a position is the bitmask of the numbers it still holds. Which
+    configurations put which ship on each cell is worked out once when the search starts, so splitting a position by
+    the outcomes of a shot is an & per ship instead of a pass over the bits of every configuration.
+    """
+    def __init__(self, table_size=1 << 18, max_nodes=500, seed=0):
+        self.table = TranspositionTable(table_size)
+        self.max_nodes = max_nodes
+        self.rng = random.Random(seed)
+        self.keys = {}
+        self.nodes = 0
+        self.searches = 0
+        self.elapsed = 0.0
+        self.limit = 0
+        self.config_keys = []
+        self.cover = {}
+        self.member_keys = {}
+
+    def zobrist(self, item):
+        key = self.keys.get(item)
+        if key is None:
+            key = self.keys[item] = self.rng.getrandbits(64)
+        return key
+
+    def solve(self, configs, observations, fired, hits, remaining):
+        """Finds the shot with the fewest expected shots left to win
+            Parameters:
+                configs (list[tuple[int, tuple[int]]]): the (union, masks) of every configuration still possible
+                observations (tuple[int]): a different nonzero number for each ship in masks
+                fired (int): the bitmask of every cell fired at so far
+                hits (list[tuple[int, int]]): the (cell, observation) of every hit on the ships in masks
+                remaining (tuple[int]): how many cells of each ship in masks have not been hit yet
+            Returns:
+                cell (int): the cell to fire at, as row * columns + col, or None if the search ran out of nodes
+                expected (float): the expected number of shots left to win after firing there
+        """
+        start = time.perf_counter()
+        self.limit = self.nodes + self.max_nodes
+        self.searches += 1
+        self.config_keys = [self.zobrist(tuple(sorted(zip(observations, masks)))) for union, masks in configs]
+        self.member_keys = {}
+        cover = {}
+        for number, (union, masks) in enumerate(configs):
+            bit = 1 << number
+            for index, mask in enumerate(masks, 1):
+                while mask:
+                    low = mask & -mask
+                    cell = low.bit_length() - 1
+                    mask ^= low
+                    if fired >> cell & 1:
+                        continue
+                    ships = cover.get(cell)
+                    if ships is None:
+                        ships = cover[cell] = [0, {}]
+                    ships[0] |= bit
+                    ships[1][index] = ships[1].get(index, 0) | bit
+        self.cover = cover
+        hit_key = 0
+        for hit in hits:
+            hit_key ^= self.zobrist(hit)
+        members = (1 << len(configs)) - 1
+        try:
+            total, cell = self._best(members, observations, fired, hit_key, tuple(remaining), math.inf)
+        except SearchLimit:
+            return None, None
+        finally:
+            self.elapsed += time.perf_counter() - start
+        return cell, total / len(configs)
+
+    def _members_key(self, members):
+        """XORs together the keys of the configurations numbered in members"""
+        key = self.member_keys.get(members)
+        if key is None:
+            key = 0
+            config_keys = self.config_keys
+            bits = members
+            while bits:
+                low = bits & -bits
+                key ^= config_keys[low.bit_length() - 1]
+                bits ^= low
+            self.member_keys[members] = key
+        return key
+
+    def _value(self, members, observations, fired, hit_key, remaining, bound):
+        """Returns the total shots to win over members, exactly if it is below bound and as a lower bound otherwise"""
+        if not members & (members - 1):
+            return sum(remaining)
+        key = self._members_key(members) ^ hit_key
+        entry = self.table.get(key)
+        if entry is not None and (entry[1] or entry[0] >= bound):
+            return entry[0]
+        total, cell = self._best(members, observations, fired, hit_key, remaining, bound)
+        self.table.put(key, (total, total < bound))
+        return total
+
+    def _best(self, members, observations, fired, hit_key, remaining, bound):
+        self.nodes += 1
+        if self.nodes > self.limit:
+            raise SearchLimit
+        count = _popcount(members)
+        lowest = shots_floor(count, remaining)
+        lefts = [remaining] + [remaining[:index] + (left - 1,) + remaining[index + 1:]
+                               for index, left in enumerate(remaining)]
+        best, best_cell = bound, None
+        for cell, parts in self._shots(members, fired, count):
+            floors = [(index, part, shots_floor(_popcount(part), lefts[index])) for index, part in parts]
+            total = count
+            for index, part, floor in floors:
+                total += floor
+            if total >= best:
+                continue
+            for index, part, floor in floors:
+                left = lefts[index]
+                child_fired = fired
+                child_hit_key = hit_key
+                if index:
+                    child_fired |= 1 << cell
+                    child_hit_key ^= self.zobrist((cell, observations[index - 1]))
+                value = self._value(part, observations, child_fired, child_hit_key, left, best - (total - floor))
+                total += value - floor
+                if total >= best:
+                    break
+            else:
+                best, best_cell = total, cell
+                if best == lowest:
+                    break
+        return best, best_cell
+
+    def _shots(self, members, fired, count):
+        """Lists every cell worth firing at with the configurations split by what firing there reveals
+
+        Parts are (0, part) for a miss and (index + 1, part) for a hit on the ship at masks[index], each part the
+        bitmask of the configurations it holds. Cells no configuration covers are never worth a shot. A cell every
+        configuration covers has to be fired at sooner or later anyway, so it is the only one tried. The rest go most
+        likely hit first, which finds a good shot early and lets the bound cut off the others sooner.
+        """
+        coverage = []
+        for cell, (covering, ships) in self.cover.items():
+            covered = members & covering
+            if covered and not fired >> cell & 1:
+                hits = _popcount(covered)
+                if hits == count:
+                    coverage = [(hits, cell, ships)]
+                    break
+                coverage.append((hits, cell, ships))
+        coverage.sort(key=lambda item: -item[0])
+        splits = []
+        for hits, cell, ships in coverage:
+            parts = [(0, members & ~self.cover[cell][0])] if hits < count else []
+            for index, ship in ships.items():
+                part = members & ship
+                if part:
+                    parts.append((index, part))
+            splits.append((cell, parts))
+        return splits
+
+    def report(self):
+        rate = self.nodes / self.elapsed if self.elapsed else 0.0
+        return (f'endgame solver: {self.searches} searches, {self.nodes} nodes in {self.elapsed:.2f}s '
+                f'({rate:,.0f} nodes/s), transposition table: {len(self.table)} positions, hit rate '
+                f'{self.table.hit_rate:.1%} ({self.table.hits} of {self.table.lookups} lookups)')
@@ -0,0 +1,99 @@
+class SparseRow:
+    def __init__(self, board, row):
+        self.board = board
+        self.row = row
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            cells = self.board.cells.get(self.row, {})
+            return [cells.get(col, '*') for col in range(*index.indices(self.board.columns))]
+        if index < 0:
+            index += self.board.columns
+        if not 0 <= index < self.board.columns:
+            raise IndexError('column index out of range')
+        return self.board.cell(self.row, index)
+
+    def __setitem__(self, index, value):
+        if index < 0:
+            index += self.board.columns
+        if not 0 <= index < self.board.columns:
+            raise IndexError('column index out of range')
+        self.board.set_cell(self.row, index, value)
+
+    def __len__(self):
+        return self.board.columns
+
+    def __iter__(self):
+        cells = self.board.cells.get(self.row, {})
+        for col in range(self.board.columns):
+            yield cells.get(col, '*')
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class SparseBoard:
+    """A battleship board that only stores the cells that are not empty, for huge boards that are mostly water
+
+    cells maps a row to a dict of the columns in it that hold a ship letter, 'X' or 'O', so the memory a board takes
+    grows with its ships and shots and not with its size. Indexing with board[row][col] reads and writes single
+    characters like Board does, and slicing a row only builds the part of it asked for.
+    """
+    def __init__(self, rows, columns):
+        self.rows = rows
+        self.columns = columns
+        self.clear_board()
+
+    def cell(self, row, col):
+        cells = self.cells.get(row)
+        if cells is None:
+            return '*'
+        return cells.get(col, '*')
+
+    def set_cell(self, row, col, value):
+        if value == '*':
+            cells = self.cells.get(row)
+            if cells is not None and cells.pop(col, None) is not None and not cells:
+                del self.cells[row]
+        else:
+            cells = self.cells.get(row)
+            if cells is None:
+                cells = self.cells[row] = {}
+            cells[col] = value
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [SparseRow(self, row) for row in range(*index.indices(self.rows))]
+        if index < 0:
+            index += self.rows
+        if not 0 <= index < self.rows:
+            raise IndexError('row index out of range')
+        return SparseRow(self, index)
+
+    def __iter__(self):
+        for row in range(self.rows):
+            yield SparseRow(self, row)
+
+    def __repr__(self):
+        return '\n'.join([' '.join(row) for row in self])
+
+    def copy(self):
+        board = SparseBoard(self.rows, self.columns)
+        board.cells = {row: dict(cells) for row, cells in self.cells.items()}
+        return board
+
+    def apply_shot(self, row, col, hit):
+        """Marks a cell 'X' for a hit or 'O' for a miss, remembering what it was so undo_shot can put it back"""
+        self.undo_stack.append((row, col, self.cell(row, col)))
+        self.set_cell(row, col, 'X' if hit else 'O')
+
+    def undo_shot(self):
+        row, col, cell = self.undo_stack.pop()
+        self.set_cell(row, col, cell)
+
+    def clear_board(self):
+        self.cells = {}
+        self.undo_stack = []
@@ -0,0 +1,288 @@
+import random
+
+from battleship.engine import MISS, SUNK, WIN
+from battleship.placement import ship_slots
+from battleship.shots import ShotHistory
+from battleship.solver import EndgameSolver
+
+FIRED = 1 << 40
+
+
+class Strategy:
+    """A computer shooter that picks where to fire next
+
+    Subclasses implement next_shot and can use record to learn from the ShotResult of every shot they took. In salvo
+    games next_salvo picks all of a turn's shots before any of them are recorded.
+    """
+    name = None
+
+    def __init__(self, rows, columns, ship_dict, rng=None):
+        self.rows = rows
+        self.columns = columns
+        self.ship_dict = ship_dict
+        self.rng = rng or random.Random()
+
+    def next_shot(self):
+        raise NotImplementedError
+
+    def next_salvo(self, count):
+        """Picks count different cells to fire at together, for strategies whose next_shot never repeats itself"""
+        shots = []
+        while len(shots) < count:
+            shot = self.next_shot()
+            if shot not in shots:
+                shots.append(shot)
+        return shots
+
+    def record(self, result):
+        pass
+
+    def report(self):
+        """Describes how the strategy went about its shots, or None if there is nothing to tell"""
+        return None
+
+
+class RandomStrategy(Strategy):
+    name = 'random'
+
+    def __init__(self, rows, columns, ship_dict, rng=None):
+        super().__init__(rows, columns, ship_dict, rng)
+        self.cells = list(range(rows * columns))
+
+    def next_shot(self):
+        index = self.rng.randrange(len(self.cells))
+        cell = self.cells[index]
+        self.cells[index] = self.cells[-1]
+        self.cells.pop()
+        return divmod(cell, self.columns)
+
+
+class HuntTargetStrategy(Strategy):
+    """Fires at random on a checkerboard until it hits something, then fires around the hits until they sink"""
+    name = 'hunt'
+
+    def __init__(self, rows, columns, ship_dict, rng=None):
+        super().__init__(rows, columns, ship_dict, rng)
+        self.fired = ShotHistory(rows, columns)
+        self.targets = []
+        parity = min(ship_dict.values()) if ship_dict else 1
+        self.hunt_cells = [cell for cell in range(rows * columns) if sum(divmod(cell, columns)) % parity == 0]
+        self.other_cells = [cell for cell in range(rows * columns) if sum(divmod(cell, columns)) % parity != 0]
+
+    def _take_random(self, cells):
+        while cells:
+            index = self.rng.randrange(len(cells))
+            cell = cells[index]
+            cells[index] = cells[-1]
+            cells.pop()
+            row, col = divmod(cell, self.columns)
+            if (row, col) not in self.fired:
+                return row, col
+        return None
+
+    def next_shot(self):
+        while self.targets:
+            row, col = self.targets.pop()
+            if (row, col) not in self.fired:
+                return row, col
+        shot = self._take_random(self.hunt_cells) or self._take_random(self.other_cells)
+        if shot is None:
+            raise RuntimeError('every cell has already been fired at')
+        return shot
+
+    def record(self, result):
+        row, col = result.row, result.col
+        self.fired.add(row, col)
+        if result.outcome == MISS or result.outcome == SUNK:
+            return
+        for next_row, next_col in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+            if 0 <= next_row < self.rows and 0 <= next_col < self.columns and (next_row, next_col) not in self.fired:
+                self.targets.append((next_row, next_col))
+
+
+class DensityStrategy(Strategy):
+    """Fires at the cell covered by the most spots the remaining ships could still be in
+
+    For every cell it keeps a count of the legal placements of each unsunk ship that cover it. A miss only removes the
+    placements that cross the missed cell and a sink only removes that ship's placements, so the counts are updated
+    incrementally instead of being recounted after every shot. While a ship has been hit but not sunk, it only
+    considers that ship's placements that cover all of its hits.
+    """
+    name = 'density'
+
+    def __init__(self, rows, columns, ship_dict, rng=None):
+        super().__init__(rows, columns, ship_dict, rng)
+        self.density = [0] * (rows * columns)
+        self.alive = {}
+        self.hits = {}
+        self.slots = {}
+        for letter, size in ship_dict.items():
+            slots, slot_cells, cover = ship_slots(rows, columns, size)
+            self.slots[letter] = (slot_cells, cover)
+            self.alive[letter] = bytearray(b'\x01') * len(slot_cells)
+            self.hits[letter] = []
+            for cells in slot_cells:
+                for cell in cells:
+                    self.density[cell] += 1
+
+    def _remove(self, letter, slot):
+        alive = self.alive[letter]
+        if alive[slot]:
+            alive[slot] = 0
+            density = self.density
+            for cell in self.slots[letter][0][slot]:
+                density[cell] -= 1
+
+    def _remove_crossing(self, cell, keep=None):
+        for letter in self.alive:
+            if letter != keep:
+                for slot in self.slots[letter][1][cell]:
+                    self._remove(letter, slot)
+
+    def _target(self):
+        density = self.density
+        scores = {}
+        for letter, hits in self.hits.items():
+            if not hits:
+                continue
+            slot_cells, cover = self.slots[letter]
+            alive = self.alive[letter]
+            for slot in cover[hits[0]]:
+                cells = slot_cells[slot]
+                if alive[slot] and all(hit in cells for hit in hits):
+                    for cell in cells:
+                        if density[cell] >= 0:
+                            scores[cell] = scores.get(cell, 0) + 1
+        if not scores:
+            return None
+        return max(scores, key=scores.get)
+
+    def next_shot(self):
+        cell = self._target()
+        if cell is None:
+            best = max(self.density)
+            if best < 0:
+                raise RuntimeError('every cell has already been fired at')
+            cell = self.density.index(best)
+        return divmod(cell, self.columns)
+
+    def next_salvo(self, count):
+        """Picks the best shot, then the best density shots after it, each one set aside until the salvo is picked"""
+        shots = []
+        density = self.density
+        for shot in range(count):
+            row, col = self.next_shot() if not shots else DensityStrategy.next_shot(self)
+            shots.append((row, col))
+            density[row * self.columns + col] -= FIRED
+        for row, col in shots:
+            density[row * self.columns + col] += FIRED
+        return shots
+
+    def record(self, result):
+        cell = result.row * self.columns + result.col
+        if self.density[cell] < 0:
+            return
+        self.density[cell] -= FIRED
+        if result.outcome == MISS:
+            self._remove_crossing(cell)
+            return
+        letter = result.letter
+        if letter not in self.alive:
+            return
+        self._remove_crossing(cell, keep=letter)
+        self.hits[letter].append(cell)
+        if result.outcome == SUNK or result.outcome == WIN:
+            for slot in range(len(self.alive[letter])):
+                self._remove(letter, slot)
+            del self.alive[letter]
+            del self.hits[letter]
+
+
+class EndgameStrategy(DensityStrategy):
+    """Plays like DensityStrategy until few ships are left, then fires the shot an exact search says is best
+
+    Once at most max_ships ships are afloat and at most max_configs ways of placing them agree with every shot so
+    far, an EndgameSolver finds the shot with the fewest expected shots left to win, taking every one of those ways
+    to be equally likely. Positions are remembered across turns, so the search after a shot mostly reuses the one
+    before it. A search that runs out of nodes falls back to the density shot.
+    """
+    name = 'endgame'
+    max_ships = 2
+    max_configs = 24
+
+    def __init__(self, rows, columns, ship_dict, rng=None):
+        super().__init__(rows, columns, ship_dict, rng)
+        self.solver = EndgameSolver(seed=self.rng.getrandbits(32))
+        self.observations = {letter: number for number, letter in enumerate(sorted(ship_dict), 1)}
+        self.fired = 0
+
+    def _configs(self):
+        """Lists every placement of the ships still afloat that agrees with the shots so far, or None if too many"""
+        choices = []
+        for letter in self.alive:
+            slot_cells, cover = self.slots[letter]
+            alive = self.alive[letter]
+            hits = self.hits[letter]
+            if not hits and alive.count(1) > self.max_configs:
+                return None
+            slots = cover[hits[0]] if hits else range(len(alive))
+            masks = []
+            for slot in slots:
+                cells = slot_cells[slot]
+                if alive[slot] and all(hit in cells for hit in hits):
+                    masks.append(sum(1 << cell for cell in cells))
+            choices.append((letter, masks))
+        choices.sort(key=lambda choice: len(choice[1]))
+        configs = []
+
+        def extend(index, union, masks):
+            if index == len(choices):
+                configs.append((union, masks))
+                if len(configs) > self.max_configs:
+                    raise OverflowError
+                return
+            for mask in choices[index][1]:
+                if not union & mask:
+                    extend(index + 1, union | mask, masks + (mask,))
+
+        try:
+            extend(0, 0, ())
+        except OverflowError:
+            return None
+        return [letter for letter, masks in choices], configs
+
+    def next_shot(self):
+        if len(self.alive) <= self.max_ships:
+            found = self._configs()
+            if found and found[1]:
+                letters, configs = found
+                observations = tuple(self.observations[letter] for letter in letters)
+                hits = [(cell, self.observations[letter]) for letter in letters for cell in self.hits[letter]]
+                remaining = [self.ship_dict[letter] - len(self.hits[letter]) for letter in letters]
+                cell, expected = self.solver.solve(configs, observations, self.fired, hits, remaining)
+                if cell is not None:
+                    return divmod(cell, self.columns)
+        return super().next_shot()
+
+    def record(self, result):
+        self.fired |= 1 << (result.row * self.columns + result.col)
+        super().record(result)
+
+    def report(self):
+        return self.solver.report()
+
+
+STRATEGIES = {
+    RandomStrategy.name: RandomStrategy,
+    HuntTargetStrategy.name: HuntTargetStrategy,
+    DensityStrategy.name: DensityStrategy,
+    EndgameStrategy.name: EndgameStrategy,
+}
+
+
+def make_strategy(name, rows, columns, ship_dict, rng=None):
+    try:
+        strategy_class = STRATEGIES[name]
+    except KeyError:
+        raise ValueError(f'unknown strategy {name!r}, expected one of {", ".join(STRATEGIES)}') from None
+    return strategy_class(rows, columns, ship_dict, rng)
@@ -0,0 +1,284 @@
+"""Round-robin tournaments between strategies, with Bradley-Terry ratings and checkpoints to resume from
+
+Every game of a tournament has its own fleet, and every strategy fires at that same fleet, so no pairing is luckier
+with its fleets than another. Shooting never depends on what the opponent does, so each strategy only fires at a
+game's fleet once and every pairing is decided from the shots it took: whoever sinks the fleet in fewer shots wins,
+and on a tie the player who fired first does, as they would have got there first. The first player alternates from
+game to game and between the two strategies of every pairing.
+
+A checkpoint is a JSON lines file. The first line holds the settings and every line after it the shots of one
+finished chunk of games, appended as soon as the chunk is done, so a tournament that was stopped picks up where it
+left off and a line cut short by a crash is simply played again.
+"""
+import itertools
+import json
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from battleship.placement import random_fleet
+from battleship.simulate import play_fleet
+from battleship.strategies import STRATEGIES
+
+CHECKPOINT_VERSION = 1
+
+
+class CheckpointError(ValueError):
+    pass
+
+
+def run_chunk(rows, columns, ship_dict, strategies, seed, start, games):
+    """Plays games start to start + games in a worker and sends back how many shots each strategy took in each"""
+    results = []
+    for game in range(start, start + games):
+        placements = random_fleet(rows, columns, ship_dict, random.Random(f'{seed}:{game}'))
+        results.append([play_fleet(rows, columns, ship_dict, placements, strategy,
+                                   random.Random(f'{seed}:{game}:{strategy}'))
+                        for strategy in strategies])
+    return results
+
+
+def game_winner(game, first, second, first_shots, second_shots):
+    """Decides a game of a pairing, first being the strategy listed first, from the shots each took to win"""
+    if game % 2:
+        first, second, first_shots, second_shots = second, first, second_shots, first_shots
+    return first if first_shots <= second_shots else second
+
+
+def bradley_terry(wins, prior=0.5, iterations=1000, tolerance=1e-10):
+    """Fits Bradley-Terry strengths to a matrix of wins with the MM algorithm
+        Parameters:
+            wins (list[list[float]]): wins[i][j] is how many games strategy i won against strategy j
+            prior (float): wins given to each side of every pairing up front, so a strategy that never lost or never
+            won still gets a finite rating
+            iterations (int): the most updates to make
+            tolerance (float): stop once no strength changes by more than this
+        Returns:
+            strengths (list[float]): each strategy's strength, with a geometric mean of 1
+    """
+    count = len(wins)
+    strengths = [1.0] * count
+    for iteration in range(iterations):
+        updated = []
+        for i in range(count):
+            won = sum(wins[i][j] + prior for j in range(count) if j != i)
+            played = sum((wins[i][j] + wins[j][i] + 2 * prior) / (strengths[i] + strengths[j])
+                         for j in range(count) if j != i)
+            updated.append(won / played if played else 1.0)
+        scale = math.exp(sum(math.log(strength) for strength in updated) / count)
+        updated = [strength / scale for strength in updated]
+        change = max(abs(new - old) for new, old in zip(updated, strengths))
+        strengths = updated
+        if change < tolerance:
+            break
+    return strengths
+
+
+def elo(strength):
+    """Turns a Bradley-Terry strength into an Elo rating, where 400 points is ten to one odds"""
+    return 400 * math.log10(strength)
+
+
+class TournamentResults:
+    """The shots every strategy took in every game so far, and the ratings and tables worked out from them"""
+    def __init__(self, strategies, seed, games=None):
+        self.strategies = list(strategies)
+        self.seed = seed
+        self.games = games or {}
+
+    def add(self, start, results):
+        for game, shots in enumerate(results, start):
+            self.games[game] = shots
+
+    def wins(self, counts=None):
+        """Counts wins[i][j], the games strategy i won against strategy j, weighting game patterns by counts"""
+        count = len(self.strategies)
+        wins = [[0] * count for strategy in self.strategies]
+        for pattern, times in (counts or self.patterns()).items():
+            for (i, j), winner in zip(itertools.combinations(range(count), 2), pattern):
+                if winner == i:
+                    wins[i][j] += times
+                else:
+                    wins[j][i] += times
+        return wins
+
+    def patterns(self):
+        """Groups games by who won every pairing in them, which there are far fewer kinds of than there are games"""
+        pairs = list(itertools.combinations(range(len(self.strategies)), 2))
+        patterns = {}
+        for game in sorted(self.games):
+            shots = self.games[game]
+            pattern = tuple(game_winner(game, i, j, shots[i], shots[j]) for i, j in pairs)
+            patterns[pattern] = patterns.get(pattern, 0) + 1
+        return patterns
+
+    def ratings(self, bootstrap=200, confidence=95, rng=None):
+        """Rates every strategy, with a confidence interval from refitting to games resampled with replacement
+            Parameters:
+                bootstrap (int): how many resamples to refit, no intervals are worked out if 0
+                confidence (float): how wide the intervals are, in percent
+                rng (random.Random): where the resampling's randomness comes from
+            Returns:
+                ratings (list[tuple[float, float, float]]): the (elo, low, high) of every strategy
+        """
+        patterns = self.patterns()
+        ratings = [elo(strength) for strength in bradley_terry(self.wins(patterns))]
+        if not bootstrap or not patterns:
+            return [(rating, rating, rating) for rating in ratings]
+        rng = rng or random.Random(self.seed)
+        kinds = list(patterns)
+        weights = list(itertools.accumulate(patterns.values()))
+        samples = [[] for strategy in self.strategies]
+        for resample in range(bootstrap):
+            counts = {}
+            for kind in rng.choices(kinds, cum_weights=weights, k=len(self.games)):
+                counts[kind] = counts.get(kind, 0) + 1
+            for sample, strength in zip(samples, bradley_terry(self.wins(counts))):
+                sample.append(elo(strength))
+        tail = (100 - confidence) / 200
+        intervals = []
+        for rating, sample in zip(ratings, samples):
+            sample.sort()
+            low = sample[int(tail * (len(sample) - 1))]
+            high = sample[math.ceil((1 - tail) * (len(sample) - 1))]
+            intervals.append((rating, low, high))
+        return intervals
+
+    def report(self, bootstrap=200, confidence=95):
+        """Formats the ratings, each strategy's mean shots to win and how every pairing went"""
+        games = len(self.games)
+        count = len(self.strategies)
+        wins = self.wins()
+        ratings = self.ratings(bootstrap, confidence)
+        order = sorted(range(count), key=lambda i: -ratings[i][0])
+        width = max(8, *(len(strategy) for strategy in self.strategies))
+        lines = [f'strategies: {count}  games: {games}  seed: {self.seed}',
+                 f'{"rank":>4} {"strategy":<{width}} {"elo":>7} {f"{confidence:g}% interval":>17} {"score":>7} '
+                 f'{"mean shots":>10}']
+        for rank, i in enumerate(order, 1):
+            rating, low, high = ratings[i]
+            played = games * (count - 1)
+            score = sum(wins[i]) / played if played else 0.0
+            mean = sum(shots[i] for shots in self.games.values()) / games if games else 0.0
+            lines.append(f'{rank:>4} {self.strategies[i]:<{width}} {rating:>+7.0f} {f"{low:+.0f} to {high:+.0f}":>17} '
+                         f'{score:>7.1%} {mean:>10.2f}')
+        lines.append('')
+        lines.append('wins of the row against the column:')
+        lines.append(f'{"":<{width}} ' + ' '.join(f'{self.strategies[j]:>{width}}' for j in order))
+        for i in order:
+            cells = ' '.join(f'{"-" if i == j else f"{wins[i][j] / games:.1%}" if games else "":>{width}}'
+                             for j in order)
+            lines.append(f'{self.strategies[i]:<{width}} {cells}')
+        return '\n'.join(lines)
+
+
+class Tournament:
+    """Plays a round-robin tournament between strategies across a pool of processes
+
+    Games go out in small chunks, and each worker takes the next chunk as soon as it is done with its last one, so
+    workers that drew slow games never leave the others waiting at the end of a batch.
+    """
+    def __init__(self, rows, columns, ship_dict, strategies, games=1000, seed=None, chunk_size=None, checkpoint=None):
+        strategies = list(dict.fromkeys(strategies))
+        if len(strategies) < 2:
+            raise ValueError('a tournament needs at least two strategies')
+        for strategy in strategies:
+            if strategy not in STRATEGIES:
+                raise ValueError(f'unknown strategy {strategy!r}, expected one of {", ".join(STRATEGIES)}')
+        if games < 1:
+            raise ValueError('games has to be at least 1')
+        self.rows = rows
+        self.columns = columns
+        self.ship_dict = dict(sorted(ship_dict.items(), key=lambda item: item[0]))
+        self.strategies = strategies
+        self.games = games
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.checkpoint = checkpoint
+
+    def settings(self):
+        return {'version': CHECKPOINT_VERSION, 'rows': self.rows, 'columns': self.columns, 'ships': self.ship_dict,
+                'strategies': self.strategies, 'games': self.games, 'seed': self.seed, 'chunk_size': self.chunk_size}
+
+    def _load_checkpoint(self):
+        """Reads the chunks a checkpoint already has, taking its seed and chunk size, or starts a new checkpoint"""
+        done = {}
+        if not os.path.exists(self.checkpoint):
+            return done
+        with open(self.checkpoint, encoding='utf-8') as file:
+            lines = file.read().split('\n')
+        try:
+            settings = json.loads(lines[0])
+        except ValueError:
+            raise CheckpointError(f'{self.checkpoint} is not a tournament checkpoint') from None
+        mine = self.settings()
+        for key in ('version', 'rows', 'columns', 'ships', 'strategies', 'games'):
+            if settings.get(key) != mine[key]:
+                raise CheckpointError(f'{self.checkpoint} is for a different tournament: its {key} is '
+                                      f'{settings.get(key)!r}, not {mine[key]!r}')
+        if self.seed is not None and settings['seed'] != self.seed:
+            raise CheckpointError(f'{self.checkpoint} was played with seed {settings["seed"]}, not {self.seed}')
+        self.seed = settings['seed']
+        self.chunk_size = settings['chunk_size']
+        for line in lines[1:]:
+            try:
+                start, results = json.loads(line)
+            except ValueError:
+                continue
+            done[start] = results
+        if lines[-1]:
+            with open(self.checkpoint, 'a', encoding='utf-8') as file:
+                file.write('\n')
+        return done
+
+    def _save(self, line):
+        with open(self.checkpoint, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(line, separators=(',', ':')) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+
+    def run(self, workers=None, progress=None):
+        """Plays every game the checkpoint does not have yet
+            Parameters:
+                workers (int): how many processes to use, defaults to one per CPU
+                progress (callable): called with the number of games finished and the total after every chunk
+            Returns:
+                results (TournamentResults): the shots of every game
+        """
+        workers = workers or os.cpu_count() or 1
+        done = self._load_checkpoint() if self.checkpoint else {}
+        if self.seed is None:
+            self.seed = random.randrange(2 ** 32)
+        if self.chunk_size is None:
+            self.chunk_size = max(1, min(100, self.games // (workers * 16)))
+        if self.checkpoint and not done and not os.path.exists(self.checkpoint):
+            self._save(self.settings())
+        results = TournamentResults(self.strategies, self.seed)
+        for start, chunk in done.items():
+            results.add(start, chunk)
+        chunks = [(self.rows, self.columns, self.ship_dict, self.strategies, self.seed, start,
+                   min(self.chunk_size, self.games - start))
+                  for start in range(0, self.games, self.chunk_size) if start not in done]
+
+        def finish(start, chunk):
+            results.add(start, chunk)
+            if self.checkpoint:
+                self._save([start, chunk])
+            if progress is not None:
+                progress(len(results.games), self.games)
+
+        if workers == 1:
+            for args in chunks:
+                finish(args[5], run_chunk(*args))
+            return results
+        executor = ProcessPoolExecutor(max_workers=workers)
+        try:
+            futures = {executor.submit(run_chunk, *args): args[5] for args in chunks}
+            for future in as_completed(futures):
+                finish(futures[future], future.result())
+        except BaseException:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+        return results
@@ -0,0 +1,45 @@
+class TurnOrder:
+    """The players still in a game, by index, in the order they take turns
+
+    The players are kept in a ring of next and previous links, so passing the turn skips everyone who has been
+    knocked out without looking at them, and knocking a player out only relinks their neighbours. A player knocked
+    out last can be put back with restore, which is how a shot is taken back.
+    """
+    def __init__(self, count):
+        self.count = count
+        self.next = [index + 1 for index in range(count - 1)] + [0]
+        self.previous = [count - 1] + [index for index in range(count - 1)]
+        self.out = bytearray(count)
+        self.alive = count
+
+    def after(self, index):
+        """The next player still in the game after index"""
+        return self.next[index]
+
+    def eliminate(self, index):
+        self.next[self.previous[index]] = self.next[index]
+        self.previous[self.next[index]] = self.previous[index]
+        self.out[index] = 1
+        self.alive -= 1
+
+    def restore(self, index):
+        """Puts back the player knocked out last, whose links still point at their old neighbours"""
+        self.next[self.previous[index]] = index
+        self.previous[self.next[index]] = index
+        self.out[index] = 0
+        self.alive += 1
+
+    def __contains__(self, index):
+        return not self.out[index]
+
+    def __iter__(self):
+        """Yields the players still in the game, by index, in turn order from the first of them"""
+        start = 0
+        while self.out[start]:
+            start += 1
+        index = start
+        while True:
+            yield index
+            index = self.next[index]
+            if index == start:
+                return
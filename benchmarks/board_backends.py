@@ -0,0 +1,46 @@
+"""Compares how long it takes to build a game's boards with each backend and how much memory they use
+
+    python benchmarks/board_backends.py 10 1000 5000
+
+A two-player game builds one placement board per player, the second a copy of the first, and each firing board is a
+FiringView of a placement board with no cells of its own, so that is what is built and measured here.
+"""
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, __file__.rsplit('benchmarks', 1)[0])
+
+from battleship.backends import BACKENDS, make_board
+from battleship.firing_view import FiringView
+
+PLAYERS = 2
+
+
+def measure(backend, size):
+    tracemalloc.start()
+    start = time.perf_counter()
+    board = make_board(size, size, backend)
+    boards = [board] + [board.copy() for player in range(1, PLAYERS)]
+    views = [FiringView(board) for board in boards]
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(sizes):
+    print(f'{PLAYERS} placement boards and {PLAYERS} firing views per game')
+    print(f'{"backend":>10} {"size":>11} {"build (s)":>10} {"peak (MB)":>10}')
+    for size in sizes:
+        for backend in BACKENDS:
+            try:
+                elapsed, peak = measure(backend, size)
+            except ImportError as error:
+                print(f'{backend:>10} skipped: {error}')
+                continue
+            print(f'{backend:>10} {f"{size}x{size}":>11} {elapsed:>10.4f} {peak / 2 ** 20:>10.1f}')
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or [10, 1000, 5000])
@@ -0,0 +1,253 @@
+"""Times the game's hot paths over several board sizes and fleets, and compares two runs for regressions
+
+    python benchmarks/suite.py run --output results.json
+    python benchmarks/suite.py run --sizes 10 100 --backends list bitboard --output after.json
+    python benchmarks/suite.py compare results.json after.json --threshold 10
+
+Every benchmark reports how many operations it did a second in the best of --rounds rounds of at least --min-time
+seconds each, and the peak memory traced while running it once. A comparison lists how much each benchmark's
+throughput changed and exits with status 1 if any of them slowed down by more than the threshold percentage.
+"""
+import argparse
+import datetime
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, __file__.rsplit('benchmarks', 1)[0])
+
+from battleship.backends import BACKENDS, make_board
+from battleship.engine import GameEngine, WIN, shot_outcome
+from battleship.fleet import Fleet, ship_cells
+from battleship.placement import random_fleet
+from battleship.shots import ShotHistory
+from battleship.strategies import make_strategy
+
+FORMAT_VERSION = 1
+STANDARD_FLEET = {'B': 4, 'C': 5, 'D': 3, 'P': 2, 'S': 3}
+FLEETS = {
+    'small': {'P': 2, 'S': 3},
+    'standard': STANDARD_FLEET,
+    'large': {**STANDARD_FLEET, **{letter.lower(): size for letter, size in STANDARD_FLEET.items()}},
+}
+
+
+class Case:
+    """One benchmark on one board size, backend and fleet, with everything it needs set up beforehand"""
+    def __init__(self, rows, columns, ship_dict, backend, seed=0):
+        self.rows = rows
+        self.columns = columns
+        self.ship_dict = ship_dict
+        self.backend = backend
+        self.rng = random.Random(seed)
+        self.fleets = [random_fleet(rows, columns, ship_dict, self.rng) for fleet in range(2)]
+
+    def engine(self):
+        return GameEngine(self.rows, self.columns, self.ship_dict, backend=self.backend)
+
+    def placed_engine(self):
+        engine = self.engine()
+        for player, placements in zip(engine.players, self.fleets):
+            engine.place_fleet(player, placements)
+        return engine
+
+
+def bench_board(case):
+    """Board construction"""
+    make_board(case.rows, case.columns, case.backend)
+    return 1
+
+
+def bench_game_boards(case):
+    """A game's boards for both players: a placement board each, the firing boards being views of them"""
+    engine = case.engine()
+    return len(engine.players)
+
+
+def bench_place_ship(engine, case):
+    for player, placements in zip(engine.players, case.fleets):
+        for letter, (row, col, orientation) in placements.items():
+            engine.place_ship(player, letter, row, col, orientation)
+    return 2 * len(case.ship_dict)
+
+
+def setup_sink_checks(case):
+    fleet = Fleet()
+    for letter, (row, col, orientation) in case.fleets[0].items():
+        fleet.add(letter, ship_cells(row, col, case.ship_dict[letter], orientation))
+    return fleet
+
+
+def bench_sink_checks(fleet, case):
+    """The sink and win check after every hit, what check_sink and check_win did"""
+    checks = 0
+    for row, col in list(fleet.positions):
+        checks += 1
+        if shot_outcome(fleet, fleet.hit(row, col)) == WIN:
+            break
+    return checks
+
+
+def setup_valid_fire(case):
+    rng = random.Random(1)
+    shots = [(rng.randrange(case.rows), rng.randrange(case.columns)) for shot in range(1000)]
+    return ShotHistory(case.rows, case.columns), shots + shots[::3]
+
+
+def bench_valid_fire(state, case):
+    """Shot deduplication, what valid_fire checks on every shot, with one repeated shot for every three new ones"""
+    fired, shots = state
+    for row, col in shots:
+        if (row, col) not in fired:
+            fired.add(row, col)
+    return len(shots)
+
+
+def setup_game(case):
+    engine = case.placed_engine()
+    shooters = {player: make_strategy('hunt', case.rows, case.columns, case.ship_dict, random.Random(player))
+                for player in engine.players}
+    return engine, shooters
+
+
+def bench_game(state, case):
+    """A full headless game with the hunt strategy firing for both players, counted in shots"""
+    engine, shooters = state
+    while engine.winner is None:
+        shooter = shooters[engine.current_player]
+        shooter.record(engine.fire(*shooter.next_shot()))
+    return len(engine.history)
+
+
+def no_setup(case):
+    return None
+
+
+def without_state(benchmark):
+    return lambda state, case: benchmark(case)
+
+
+# every benchmark is a setup that is not timed and a function of what it returned and the case that is
+BENCHMARKS = {
+    'board': (no_setup, without_state(bench_board)),
+    'game_boards': (no_setup, without_state(bench_game_boards)),
+    'place_ship': (Case.engine, bench_place_ship),
+    'sink_checks': (setup_sink_checks, bench_sink_checks),
+    'valid_fire': (setup_valid_fire, bench_valid_fire),
+    'game': (setup_game, bench_game),
+}
+
+
+def measure(benchmark, case, min_time, rounds):
+    """Runs a benchmark once under tracemalloc for its peak memory, then for rounds rounds of at least min_time seconds
+
+    The throughput is the best round's, since anything else running on the machine can only ever slow a round down.
+    """
+    setup, function = benchmark
+    tracemalloc.start()
+    function(setup(case), case)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    best = None
+    for round_number in range(rounds):
+        operations = 0
+        runs = 0
+        elapsed = 0.0
+        while elapsed < min_time:
+            state = setup(case)
+            start = time.perf_counter()
+            operations += function(state, case)
+            elapsed += time.perf_counter() - start
+            runs += 1
+        if best is None or operations / elapsed > best['ops_per_second']:
+            best = {'runs': runs, 'operations': operations, 'seconds': elapsed, 'ops_per_second': operations / elapsed}
+    best['peak_bytes'] = peak
+    return best
+
+
+def run(args):
+    results = []
+    for size in args.sizes:
+        for fleet in args.fleets:
+            for backend in args.backends:
+                try:
+                    case = Case(size, size, FLEETS[fleet], backend)
+                except (ImportError, ValueError, RuntimeError) as error:
+                    print(f'skipping {backend} {size}x{size} {fleet}: {error}', file=sys.stderr)
+                    continue
+                for name in args.benchmarks:
+                    result = {'benchmark': name, 'backend': backend, 'size': f'{size}x{size}', 'fleet': fleet}
+                    result.update(measure(BENCHMARKS[name], case, args.min_time, args.rounds))
+                    results.append(result)
+                    print(f'{name:>12} {backend:>9} {result["size"]:>10} {fleet:>9} '
+                          f'{result["ops_per_second"]:>14,.0f} ops/s {result["peak_bytes"] / 2 ** 20:>9.2f} MB peak',
+                          file=sys.stderr)
+    report = {
+        'version': FORMAT_VERSION,
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=1)
+    else:
+        json.dump(report, sys.stdout, indent=1)
+        print()
+
+
+def result_key(result):
+    return result['benchmark'], result['backend'], result['size'], result['fleet']
+
+
+def compare(args):
+    with open(args.old) as file:
+        old = {result_key(result): result for result in json.load(file)['results']}
+    with open(args.new) as file:
+        new = {result_key(result): result for result in json.load(file)['results']}
+    regressions = 0
+    print(f'{"benchmark":>12} {"backend":>9} {"size":>10} {"fleet":>9} {"old ops/s":>14} {"new ops/s":>14} '
+          f'{"change":>8} {"peak MB":>9}')
+    for key in sorted(old.keys() & new.keys()):
+        before, after = old[key]['ops_per_second'], new[key]['ops_per_second']
+        change = (after - before) / before * 100
+        flag = ''
+        if change < -args.threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        print(f'{key[0]:>12} {key[1]:>9} {key[2]:>10} {key[3]:>9} {before:>14,.0f} {after:>14,.0f} {change:>+7.1f}% '
+              f'{new[key]["peak_bytes"] / 2 ** 20:>9.2f}{flag}')
+    for key in sorted(old.keys() ^ new.keys()):
+        print(f'{" ".join(key)} is only in {args.old if key in old else args.new}')
+    print(f'{regressions} regressions of more than {args.threshold}%')
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks for the game\'s hot paths')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='run the benchmarks and write the results as JSON')
+    run_parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    run_parser.add_argument('--fleets', nargs='+', choices=list(FLEETS), default=['standard', 'large'])
+    run_parser.add_argument('--backends', nargs='+', choices=list(BACKENDS), default=['list'])
+    run_parser.add_argument('--benchmarks', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    run_parser.add_argument('--min-time', type=float, default=0.1, help='seconds each round of a benchmark lasts')
+    run_parser.add_argument('--rounds', type=int, default=5, help='rounds to take the best throughput of')
+    run_parser.add_argument('--output', default=None, help='where to write the JSON results (default: stdout)')
+    run_parser.set_defaults(handler=run)
+    compare_parser = commands.add_parser('compare', help='compare two runs and flag regressions')
+    compare_parser.add_argument('old')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=10.0,
+                                help='percentage drop in throughput that counts as a regression (default: 10)')
+    compare_parser.set_defaults(handler=compare)
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
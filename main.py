@@ -1,14 +1,30 @@
 """This program runs through a game of battlehship with two players given the board creation information from a file
 """
+import argparse
+import cProfile
+import sys
+
 from battleship.files import Files
 from battleship.player import Player
 from battleship.board import Board
-
-
-def getting_board_info() -> (int, int, dict):
-    """This function iterates through a file and saves the information about the dimensions of the battleship board as
-    well as information regarding the ships
-        Parameters: None
+from battleship.backends import BACKENDS, SPARSE_BACKENDS
+from battleship.config import ConfigError, read_config
+from battleship.engine import GameEngine, ShotResult, MISS, HIT, ELIMINATED
+from battleship.gamelog import append_game
+from battleship.instrument import CONFIG, Instruments, clock
+from battleship.placement import random_fleet
+from battleship.render import ANSI, BUFFERED, QUIET, Renderer, render_board
+from battleship.shots import ShotHistory
+from battleship.strategies import STRATEGIES, make_strategy
+
+COMPUTER_NAME = 'Computer'
+
+
+def getting_board_info(instruments: Instruments = None) -> (int, int, dict):
+    """This function asks for the configuration file and reads the information about the dimensions of the battleship
+    board as well as information regarding the ships
+        Parameters:
+            instruments (Instruments): times reading the file as the config phase, if given
         Returns:
             rows (int): the number of rows of the board
             columns (int): the number of columns of the board
@@ -16,74 +32,28 @@ def getting_board_info() -> (int, int, dict):
             takes up as values
     """
     file_path = Files()
-    file = file_path.get_file("Please enter the path to the configuration file for this game: ")
-    line_count = 0
-    ship_dict = {}
-    with open(file, 'r') as configuration:
-        for line in configuration:
-            line_count += 1
-            if line_count == 1:
-                rows = int(line)
-            if line_count == 2:
-                columns = int(line)
-            if line_count == 3:
-                continue
-            if line_count >= 4:
-                ship_info = line.split()
-                character = ship_info[0]
-                size = int(ship_info[1])
-                ship_dict[character] = size
-        ship_dict = dict(sorted(ship_dict.items(), key=lambda item: item[0]))
-    return rows, columns, ship_dict
-
-
-def creating_placement_board(rows: int, columns: int) -> Board:
-    """This functions creates a battleship board by using the Board class that acts like a nested list
-        Parameters:
-            rows (int): the number of rows of the board
-            columns (int): the number of columns of the board
-        Returns:
-            placement_board (Board): the created battleship board
-    """
-    placement_board = Board(rows, columns)
-    return placement_board
+    while True:
+        file = file_path.get_file("Please enter the path to the configuration file for this game: ")
+        start = clock() if instruments is not None else 0
+        try:
+            return read_config(file)
+        except OSError as error:
+            print(f'Could not open {file}: {error.strerror}')
+        except ConfigError as error:
+            print(f'{file} is not a valid configuration: {error}')
+        finally:
+            if instruments is not None:
+                instruments.record(CONFIG, start)
 
 
-def display_board(placement_board: Board) -> None:
+def display_board(placement_board: Board, window: tuple = None) -> None:
     """This functions displays the battleship board on the screen
         Parameters:
             placement_board (Board): a battleship board
+            window (tuple): the (top, left, height, width) of the part of the board to show, all of it if not given
         Returns: None
     """
-    print(' ', *range(len(placement_board[0])))
-    for pos, row in list(enumerate(placement_board)):
-        print(pos, *row)
-
-
-def making_two_boards(placement_board: Board) -> (list[list[str]], list[list[str]]):
-    """Creates each player's placement board
-        Parameters:
-            placement_board (Board): a battleship board
-        Returns:
-            placement_board1 (list[list[str]]): player 1's placement board
-            placement_board2 (list[list[str]]): player 2's placement board
-    """
-    placement_board1 = [row[:] for row in placement_board]
-    placement_board2 = [row[:] for row in placement_board]
-    return placement_board1, placement_board2
-
-
-def create_firing_boards(placement_board: Board) -> (list[list[str]], list[list[str]]):
-    """Creates each player's firing board
-        Parameters:
-            placement_board (Board): a battleship board
-        Returns:
-            placement_board1 (list[list[str]]): player 1's firing board
-            placement_board2 (list[list[str]]): player 2's firing board
-    """
-    firing_board1 = [row[:] for row in placement_board]
-    firing_board2 = [row[:] for row in placement_board]
-    return firing_board1, firing_board2
+    sys.stdout.write(render_board(placement_board, *(window or ())))
 
 
 def get_orientation(player: str, letter: str, size: int) -> str:
@@ -115,13 +85,13 @@ def get_orientation(player: str, letter: str, size: int) -> str:
     return orientation
 
 
-def get_placement(player: str, letter: str, size: int, board: list[list[str]]) -> (int, int, str):
+def get_placement(engine: GameEngine, player: str, letter: str, size: int) -> (int, int, str):
     """Gets the coordinate of where to place the ship on the placement board
         Parameters:
+            engine (GameEngine): the game the ship is being placed in
             player (str): the player who's currently placing the ship
             letter (str): the letter that represents the ship
             size (int): the amount of space that the ship takes up on the board
-            board (list[list[str]]): the board that the player is currently placing the ship on
         Returns:
             row (int): the row of the coordinate of where the ship will be placed
             column (int): the column of the coordinate of where the ship will be placed
@@ -131,132 +101,46 @@ def get_placement(player: str, letter: str, size: int, board: list[list[str]]) -
         try:
             orientation = get_orientation(player, letter, size)
             position = input(f"Enter the starting location for your {letter}, which is {size} long, in the form row col: ")
-            position = position.split(' ')
+            position = position.split()
             row, col = int(position[0]), int(position[1])
-            if orientation == 'horizontal':
-                separate_row = board[row]
-                end = col + size + 1
-                sublist = separate_row[col: col + end]
-                count = 0
-                for spot in sublist:
-                    if spot == '*':
-                        count += 1
-                    else:
-                        break
-                    if count == size:
-                        return row, col, orientation
-            if orientation == 'vertical':
-                vert_count = 0
-                end = col + size + 1
-                for rows in board[row: row + end]:
-                    if rows[col] == '*':
-                        vert_count += 1
-                    else:
-                        break
-                    if vert_count == size:
-                        return row, col, orientation
+            if engine.can_place(player, size, row, col, orientation):
+                return row, col, orientation
         except ValueError:
             continue
         except IndexError:
             continue
 
 
-def create_player_dict(player1: str, player2: str, placement1: list[list[str]] , placement2: list[list[str]],
-                       firing1: list[list[str]], firing2: list[list[str]]):
-    """This function creates a dictionary associating each player with their respective placement board and firing board
+def place_ship(engine: GameEngine, computers: dict = None, renderer: Renderer = None) -> None:
+    """This function asks each player where their ships go and places them onto their placement boards
         Parameters:
-            player1 (str): the first player
-            player2 (str): the second player
-            placement1 (list[list[str]]): player 1's placement board
-            placement2 (list[list[str]]): player 2's placement board
-            firing1 (list[list[str]]): player 1's firing board
-            firing2 (list[list[str]]): player 2's firing board
-        Returns:
-            player_dict (dict): a dictionary associating each player with their respective placement board and firing
-            board
-    """
-    player_dict = {
-        player1: (placement1, firing1),
-        player2: (placement2, firing2)
-    }
-    return player_dict
-
-
-def place_ship(player_dict: dict, ship_dict: dict) -> dict:
-    """This function places the ships onto each player's placement boards
-        Parameters:
-            player_dict (dict): a dictionary associating each player with their respective placement board and firing board
-            ship_dict (dict): a dictionary with each ship's letter being the key and space being the value
-        Returns:
-            player_dict (dict): a dictionary associating each player with their respective placement board and firing board with the ships placed on their placement board
-    """
-    for player, board in player_dict.items():
-        print(f'{player}\'s Placement Board')
-        display_board(board[0])
-        board = board[0]
-        for letter, size in ship_dict.items():
-            row, col, orientation = get_placement(player, letter, size, board)
-            if size == 1:
-                board[row][col] = letter
-                print(f'{player}\'s Placement Board')
-                display_board(board)
-            elif orientation == 'vertical':
-                end = col + size + 1
-                count = 0
-                for rows in board[row: end]:
-                    count += 1
-                    rows[col] = letter
-                    if count == size:
-                        break
-                print(f'{player}\'s Placement Board')
-                display_board(board)
-            elif orientation == 'horizontal':
-                col_index = col - 1
-                for times in range(size):
-                    col_index += 1
-                    board[row][col_index] = letter
-                print(f'{player}\'s Placement Board')
-                display_board(board)
-    return player_dict
-
-
-def turn_change(current_turn: int) -> int:
-    """This function changes the turns in the game
-        Parameters:
-            current_turn (int): the current turn
-        Returns:
-            turn (int): the new turn
-    """
-    if current_turn == 1:
-        turn = 2
-    if current_turn == 2:
-        turn = 1
-    return turn
-
-
-def check_win(placement_board: list[list[str]]) -> bool:
-    """This function checks if a player has won the game
-        Parameters:
-            placement_board (list[list[str]]): the current player's placement board
-        Returns:
-            bool: True if a player has won the game, false otherwise
+            engine (GameEngine): the game the ships are being placed in
+            computers (dict): the computer players mapped to their strategy, their ships are placed at random
+            renderer (Renderer): draws the boards, a buffered one if not given
+        Returns: None
     """
-    win_con = ['X', 'O', '*']
-    for row in placement_board:
-        for element in row:
-            if element not in win_con:
-                return False
-    else:
-        return True
+    computers = computers or {}
+    renderer = renderer or Renderer()
+    for player in engine.players:
+        if player in computers:
+            placements = random_fleet(engine.rows, engine.columns, engine.ship_dict, computers[player].rng)
+            engine.place_fleet(player, placements)
+            continue
+        board = engine.placement_board(player)
+        renderer.frame([(f'{player}\'s Placement Board', board)])
+        for letter, size in engine.ship_dict.items():
+            row, col, orientation = get_placement(engine, player, letter, size)
+            engine.place_ship(player, letter, row, col, orientation)
+            renderer.frame([(f'{player}\'s Placement Board', board)], focus=(row, col))
 
 
-def valid_fire(player: str, rows: int, columns: int, fire_list: list) -> (int, int, str):
+def valid_fire(player: str, rows: int, columns: int, fire_list: ShotHistory) -> (int, int, str):
     """Functions checks if a firing coordinate is valid, and if it is, returns the coordinates
         Parameters:
             player (str): the player who's currently firing
             rows (int): the number of rows on the board
             columns (int): the number of columns on the board
-            fire_list (list): a list of coordinates that has already been fired at by that player
+            fire_list (ShotHistory): the cells that have already been fired at by that player
         Returns:
             row (int): the row of the coordinate to be fired at
             column (int): the column of the coordinate to be fired at
@@ -265,12 +149,9 @@ def valid_fire(player: str, rows: int, columns: int, fire_list: list) -> (int, i
     while True:
         try:
             coord = input(f'{player}, enter the location you want to fire at in the form row col: ')
-            if coord in fire_list:
-                continue
-            coord_split = coord.split(' ')
+            coord_split = coord.split()
             row, col = int(coord_split[0]), int(coord_split[1])
-            if 0 <= row <= rows - 1 and  0 <= col <= columns - 1:
-                fire_list.append(coord)
+            if 0 <= row <= rows - 1 and  0 <= col <= columns - 1 and (row, col) not in fire_list:
                 return row, col, coord
         except ValueError:
             continue
@@ -278,99 +159,112 @@ def valid_fire(player: str, rows: int, columns: int, fire_list: list) -> (int, i
             continue
 
 
-def check_sink(placement_board: list[list[str]], letter: str) -> bool:
-    """This function checks if a boat has been destroyed after a turn of firing
+def valid_salvo(player: str, rows: int, columns: int, fire_list: ShotHistory, count: int) -> list:
+    """Asks for every shot of a salvo, each one checked the way valid_fire checks it and against the rest of the salvo
         Parameters:
-            placement_board (list[list[str]]): the opposing player's placement board
-            letter (str): the letter that represents the boat we are checking
+            player (str): the player who's currently firing
+            rows (int): the number of rows on the board
+            columns (int): the number of columns on the board
+            fire_list (ShotHistory): the cells of the target's board that have already been fired at
+            count (int): how many shots the salvo has
         Returns:
-            bool: True if a boat has been destroyed, False otherwise
+            shots (list): the (row, col) of every shot in the salvo
     """
-    for row in placement_board:
-        for element in row:
-            if element == letter:
-                return False
-    else:
-        return True
+    print(f'{player}, fire a salvo of {count} shots.')
+    shots = []
+    while len(shots) < count:
+        row, col, coord = valid_fire(player, rows, columns, fire_list)
+        if (row, col) not in shots:
+            shots.append((row, col))
+    return shots
 
 
-def firing(player_dict: dict, rows: int, columns: int) -> None:
+def get_target(player: str, opponents: list) -> str:
+    """Asks the player which opponent to fire at when there is more than one left
+        Parameters:
+            player (str): the player who's currently firing
+            opponents (list): the players still in the game that can be fired at
+        Returns:
+            target (str): the opponent the player chose
+    """
+    if len(opponents) == 1:
+        return opponents[0]
+    while True:
+        target = input(f'{player}, choose who to fire at ({", ".join(opponents)}): ').strip()
+        if target in opponents:
+            return target
+
+
+def show_boards(engine: GameEngine, player: str, renderer: Renderer, focus: tuple = None, target: str = None) -> None:
+    """Displays a player's firing board and placement board as one frame
+        Parameters:
+            engine (GameEngine): the game being played
+            player (str): the player whose boards are shown
+            renderer (Renderer): draws the boards
+            focus (tuple): the (row, col) to keep in view on boards bigger than the viewport
+            target (str): whose board the firing board shows, the player's next opponent if not given
+        Returns: None
+    """
+    title = f'{player}\'s Firing Board' if len(engine.players) == 2 else f'{player}\'s Firing Board at {target}'
+    renderer.frame([(title, engine.firing_board(player, target)),
+                    (f'{player}\'s Placement Board', engine.placement_board(player))], focus)
+
+
+def announce(result: ShotResult) -> None:
+    """Prints what a shot did
+        Parameters:
+            result (ShotResult): the shot
+        Returns: None
+    """
+    if result.outcome == MISS:
+        print(f'{result.player} missed.')
+        return
+    print(f'{result.player} hit {result.target}\'s {result.letter}!')
+    if result.outcome != HIT:
+        print(f'{result.player} destroyed {result.target}\'s {result.letter}!')
+    if result.outcome == ELIMINATED:
+        print(f'{result.target} is out of the game!')
+
+
+def firing(engine: GameEngine, computers: dict = None, renderer: Renderer = None, salvo: bool = False) -> None:
     """This function conducts the action of each player taking a turn and firing at each other's placement boards and doen't stop until the game ends
         Parameters:
-            player_dict (dict): a dictionary associating each player with their respective placement board and firing board
-            rows (int): the number of rows on the board
-            columns (int): the number of columns on the board
+            engine (GameEngine): the game being played, with every ship already placed
+            computers (dict): the computer players mapped to the strategy that picks their shots
+            renderer (Renderer): draws the boards, a buffered one if not given
+            salvo (bool): each turn fire one shot for every ship still afloat, all landing together
         Returns: None
     """
-    win = False
-    fire_list1 = []
-    fire_list2 = []
-    while win != True:
-        turn = 1
-        player1, boards1 = list(player_dict.items())[0]
-        player2, boards2 = list(player_dict.items())[1]
-        placement_board1 = boards1[0]
-        firing_board1 = boards1[1]
-        placement_board2 = boards2[0]
-        firing_board2 = boards2[1]
-        if turn == 1:
-            print(f'{player1}\'s Firing Board')
-            display_board(firing_board1)
-            print(f'{player1}\'s Placement Board')
-            display_board(placement_board1)
-            row, col, coord = valid_fire(player1, rows, columns, fire_list1)
-            fire_list1.append(coord)
-            if placement_board2[row][col] == '*':
-                print(f'{player1} missed.')
-                firing_board1[row][col] = 'O'
-                placement_board2[row][col] = 'O'
+    computers = computers or {}
+    renderer = renderer or Renderer()
+    focus = None
+    while engine.winner is None:
+        player = engine.current_player
+        if player in computers:
+            target = engine.opponent
+            if salvo:
+                shots = computers[player].next_salvo(engine.salvo_size(player, target))
+                print(f'{player} fires a salvo at {", ".join(f"{row} {col}" for row, col in shots)}.')
             else:
-                letter = placement_board2[row][col]
-                print(f'{player1} hit {player2}\'s {letter}!')
-                firing_board1[row][col] = 'X'
-                placement_board2[row][col] = 'X'
-                check_sink(placement_board2, letter)
-                if check_sink(placement_board2, letter) == True:
-                    print(f'{player1} destroyed {player2}\'s {letter}!')
-        win = check_win(placement_board2)
-        turn = turn_change(turn)
-        if win == True:
-            if turn == 2:
-                print(f'{player1}\'s Firing Board')
-                display_board(firing_board1)
-                print(f'{player1}\'s Placement Board')
-                display_board(placement_board1)
-                print(f'{player1} won!')
-            break
-        if turn == 2:
-            print(f'{player2}\'s Firing Board')
-            display_board(firing_board2)
-            print(f'{player2}\'s Placement Board')
-            display_board(placement_board2)
-            row, col, coord = valid_fire(player2, rows, columns, fire_list2)
-            fire_list2.append(coord)
-            if placement_board1[row][col] == '*':
-                print(f'{player2} missed.')
-                firing_board2[row][col] = 'O'
-                placement_board1[row][col] = 'O'
+                row, col = computers[player].next_shot()
+                print(f'{player} fires at {row} {col}.')
+        else:
+            target = get_target(player, engine.opponents())
+            show_boards(engine, player, renderer, focus, target)
+            if salvo:
+                shots = valid_salvo(player, engine.rows, engine.columns, engine.shots_at[target],
+                                    engine.salvo_size(player, target))
             else:
-                letter = placement_board1[row][col]
-                print(f'{player2} hit {player1}\'s {letter}!')
-                firing_board2[row][col] = 'X'
-                placement_board1[row][col] = 'X'
-                check_sink(placement_board1, letter)
-                if check_sink(placement_board1, letter) == True:
-                    print(f'{player2} destroyed {player1}\'s {letter}!')
-        win = check_win(placement_board1)
-        turn = turn_change(turn)
-        if win == True:
-            print(f'{player2}\'s Firing Board')
-            display_board(firing_board2)
-            print(f'{player2}\'s Placement Board')
-            display_board(placement_board2)
-            if turn == 1:
-                print(f'{player2} won!')
-            break
+                row, col, coord = valid_fire(player, engine.rows, engine.columns, engine.shots_at[target])
+        results = engine.fire_salvo(shots, target) if salvo else [engine.fire(row, col, target)]
+        focus = (results[-1].row, results[-1].col)
+        for result in results:
+            if player in computers:
+                computers[player].record(result)
+            announce(result)
+        if engine.winner is not None:
+            show_boards(engine, player, renderer, focus, target)
+            print(f'{player} won!')
 
 
 def main() -> None:
@@ -378,16 +272,85 @@ def main() -> None:
         Parameters: None
         Returns: None
     """
-    rows, columns, ship_dict = getting_board_info()
-    placement_board = creating_placement_board(rows, columns)
-    placement_board1, placement_board2 = making_two_boards(placement_board)
-    firing_board1, firing_board2 = create_firing_boards(placement_board)
+    parser = argparse.ArgumentParser(description='Two-player console battleship')
+    parser.add_argument('--backend', choices=list(BACKENDS), default='list',
+                        help='how boards store their cells (default: list)')
+    parser.add_argument('--computer', choices=list(STRATEGIES), default=None,
+                        help='play against the computer using this strategy')
+    parser.add_argument('--salvo', action='store_true',
+                        help='every turn, fire one shot for each of your ships still afloat, all at once')
+    parser.add_argument('--players', type=int, default=2,
+                        help='how many people play, every one against all the others (default: 2)')
+    parser.add_argument('--render', choices=[BUFFERED, ANSI], default=BUFFERED,
+                        help='redraw every board in full, or only the cells that changed (default: buffered)')
+    parser.add_argument('--viewport', default=None, metavar='ROWSxCOLUMNS',
+                        help='only draw this much of bigger boards, around the last shot, or auto for the terminal '
+                             'size (default: auto with the sparse backend)')
+    parser.add_argument('--quiet', action='store_true', help='do not draw any boards')
+    parser.add_argument('--log', default=None, metavar='FILE', help='append the finished game to this game log')
+    parser.add_argument('--profile', nargs='?', const='', default=None, metavar='FILE',
+                        help='print how often each phase of the game ran and how long it took, and write cProfile '
+                             'stats for the whole run to FILE if given')
+    parser.add_argument('--share', nargs='?', const='', default=None, metavar='NAME',
+                        help='keep the game in shared memory, under NAME if given, for python -m battleship spectate '
+                             'and other processes to read')
+    args = parser.parse_args()
+    if args.players < 2:
+        parser.error('--players needs at least 2 players')
+    if args.players > 2 and args.computer:
+        parser.error('--computer only plays two-player games')
+    if args.players > 2 and args.log:
+        parser.error('--log only records two-player games')
+    if args.salvo and args.log:
+        parser.error('--log only records games of one shot a turn')
+    viewport = args.viewport
+    if viewport is None and args.backend in SPARSE_BACKENDS:
+        viewport = 'auto'
+    if viewport and viewport != 'auto':
+        try:
+            viewport = tuple(int(size) for size in viewport.lower().split('x'))
+        except ValueError:
+            parser.error('--viewport needs the form ROWSxCOLUMNS or auto')
+        if len(viewport) != 2:
+            parser.error('--viewport needs the form ROWSxCOLUMNS or auto')
+    instruments = Instruments() if args.profile is not None else None
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler is not None:
+        profiler.enable()
+    renderer = Renderer(QUIET if args.quiet else args.render, viewport=viewport, instruments=instruments)
+    rows, columns, ship_dict = getting_board_info(instruments)
     name_place = Player()
-    players = name_place.asking_name()
-    player1, player2 = players
-    player_dict = create_player_dict(player1, player2, placement_board1, placement_board2, firing_board1, firing_board2)
-    player_dict_finished = place_ship(player_dict, ship_dict)
-    firing(player_dict, rows, columns)
-
-
-main()
+    computers = {}
+    if args.computer:
+        players = name_place.asking_name_against_computer(COMPUTER_NAME)
+        computers[COMPUTER_NAME] = make_strategy(args.computer, rows, columns, ship_dict)
+    elif args.players > 2:
+        players = name_place.asking_names(args.players)
+    else:
+        players = name_place.asking_name()
+    engine = GameEngine(rows, columns, ship_dict, players, args.backend, instruments)
+    shared = engine.share(args.share or None) if args.share is not None else None
+    if shared is not None:
+        print(f'sharing the game as {shared.name}', file=sys.stderr)
+    try:
+        place_ship(engine, computers, renderer)
+        firing(engine, computers, renderer, args.salvo)
+    finally:
+        renderer.close()
+        if shared is not None:
+            shared.close()
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+    for strategy in computers.values():
+        report = strategy.report()
+        if report:
+            print(report)
+    if instruments is not None:
+        print(instruments.report())
+    if args.log:
+        append_game(args.log, engine)
+
+
+if __name__ == '__main__':
+    main()
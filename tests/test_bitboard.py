@@ -0,0 +1,35 @@
+import random
+
+from battleship.bitboard import BitBoard
+
+
+def test_bitboard_reads_back_what_was_written():
+    rng = random.Random(0)
+    board = BitBoard(5, 7)
+    expected = [['*'] * 7 for _ in range(5)]
+    for _ in range(2000):
+        row, col, value = rng.randrange(5), rng.randrange(7), rng.choice('*XOAB')
+        board[row][col] = value
+        expected[row][col] = value
+        assert [list(board_row) for board_row in board] == expected
+
+
+def test_bitboard_copy_is_independent():
+    board = BitBoard(3, 3)
+    board[1][1] = 'A'
+    copy = board.copy()
+    copy[1][1] = 'X'
+    copy[0][2] = 'B'
+    assert board[1][1] == 'A' and board[0][2] == '*'
+    assert copy[1][1] == 'X' and copy[0][2] == 'B'
+
+
+def test_bitboard_undo_shot():
+    board = BitBoard(4, 4)
+    board[2][3] = 'A'
+    board.apply_shot(2, 3, True)
+    board.apply_shot(0, 0, False)
+    assert board[2][3] == 'X' and board[0][0] == 'O'
+    board.undo_shot()
+    board.undo_shot()
+    assert board[2][3] == 'A' and board[0][0] == '*'
@@ -0,0 +1,26 @@
+import pytest
+
+from battleship.config import ConfigError, parse_config
+
+
+def config_text(rows, columns, ships):
+    return '\n'.join([str(rows), str(columns), str(len(ships))] + [f'{letter} {size}' for letter, size in ships]) + '\n'
+
+
+def test_parse_config_accepts_tight_fleets():
+    ships = [(chr(ord('a') + i), 4) for i in range(16)]
+    config = parse_config(config_text(8, 8, ships))
+    assert config.ship_dict == dict(ships)
+
+
+def test_parse_config_rejects_fleets_that_do_not_fit():
+    ships = [(chr(ord('a') + i), 4) for i in range(9)]
+    with pytest.raises(ConfigError, match='cannot all be placed'):
+        parse_config(config_text(6, 6, ships))
+
+
+def test_parse_config_warns_when_the_fit_check_gives_up():
+    ships = [(chr(0x100 + i), 4) for i in range(225)]
+    with pytest.warns(UserWarning, match='could not check'):
+        config = parse_config(config_text(30, 30, ships))
+    assert len(config.ship_dict) == 225
@@ -0,0 +1,47 @@
+import random
+import string
+
+import pytest
+
+from battleship.fleet import ship_cells
+from battleship.placement import fleet_fits, random_fleet
+
+# fleets that only just fit, covering most or all of the board
+TIGHT_FLEETS = [(6, 12, 3), (8, 16, 4), (10, 20, 5), (7, 12, 4), (9, 27, 3)]
+
+
+def check_fleet(rows, columns, ship_dict, placement):
+    assert set(placement) == set(ship_dict)
+    covered = set()
+    for letter, (row, col, orientation) in placement.items():
+        cells = set(ship_cells(row, col, ship_dict[letter], orientation))
+        assert all(0 <= cell_row < rows and 0 <= cell_col < columns for cell_row, cell_col in cells)
+        assert not covered & cells
+        covered |= cells
+
+
+@pytest.mark.parametrize('size,count,ship_size', TIGHT_FLEETS)
+@pytest.mark.parametrize('seed', range(10))
+def test_random_fleet_places_tight_fleets(size, count, ship_size, seed):
+    ship_dict = {string.ascii_letters[i]: ship_size for i in range(count)}
+    placement = random_fleet(size, size, ship_dict, random.Random(seed))
+    check_fleet(size, size, ship_dict, placement)
+
+
+def test_random_fleet_varies_tight_fleets():
+    ship_dict = {string.ascii_letters[i]: 3 for i in range(12)}
+    placements = {tuple(sorted(random_fleet(6, 6, ship_dict, random.Random(seed)).values())) for seed in range(10)}
+    assert len(placements) > 1
+
+
+@pytest.mark.parametrize('size,count,ship_size', [(6, 9, 4), (10, 25, 4), (3, 2, 4)])
+def test_random_fleet_rejects_fleets_that_do_not_fit(size, count, ship_size):
+    ship_dict = {string.ascii_letters[i]: ship_size for i in range(count)}
+    with pytest.raises(ValueError, match='does not fit'):
+        random_fleet(size, size, ship_dict, random.Random(0))
+
+
+def test_fleet_fits():
+    assert fleet_fits(8, 8, {string.ascii_letters[i]: 4 for i in range(16)})
+    assert fleet_fits(6, 6, {string.ascii_letters[i]: 4 for i in range(9)}) is False
+    assert fleet_fits(30, 30, {chr(0x100 + i): 4 for i in range(225)}, max_nodes=1000) is None
@@ -0,0 +1,36 @@
+import sys
+
+from battleship.engine import WIN
+from battleship.referee import INVALID, Referee
+
+SHIPS = {'A': 2, 'B': 3}
+
+BOT = '''
+import sys
+from battleship.referee import run_bot
+
+class {name}:
+    def write(self, text):
+        sys.stdout.write({text})
+
+    def flush(self):
+        sys.stdout.flush()
+
+run_bot('random', sys.stdin, {name}(), {seed})
+'''
+
+
+def bot(seed, name='Once', text='text'):
+    return [sys.executable, '-c', BOT.format(name=name, text=text, seed=seed)]
+
+
+def test_bot_answering_twice_does_not_desync_later_games():
+    stats = Referee(6, 6, SHIPS, [bot(1, 'Twice', 'text * 2'), bot(2)], move_timeout=5.0).run(6)
+    assert stats.games == 6
+    assert all(set(losses) <= {WIN} for losses in stats.losses.values())
+
+
+def test_bot_is_restarted_after_an_invalid_answer():
+    stats = Referee(6, 6, SHIPS, [bot(1, 'Garbage', "'{}' + text"), bot(2)], move_timeout=5.0).run(4)
+    assert stats.losses['bot1'] == {INVALID: 4}
+    assert stats.wins['bot2'] == 4
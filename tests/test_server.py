@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+from battleship.server import GameServer
+
+
+async def connect(port, name):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    await reader.readline()
+    await reader.readline()
+    writer.write(f'{name}\n'.encode())
+    await writer.drain()
+    return reader, writer
+
+
+async def play(reader, writer, shot):
+    """Answers every question the same way until the game is over, returning the WINNER line"""
+    while True:
+        line = (await reader.readline()).decode().strip()
+        if not line or line.startswith('WINNER'):
+            writer.close()
+            return line
+        if line.startswith('PLACE'):
+            writer.write(b'random\n')
+        elif line == 'FIRE':
+            writer.write(f'{shot}\n'.encode())
+        await writer.drain()
+
+
+def test_invalid_shots_do_not_extend_the_turn():
+    async def main():
+        server = GameServer(4, 4, {'A': 2}, turn_timeout=0.5)
+        port = (await server.start('127.0.0.1', 0)).sockets[0].getsockname()[1]
+        first = await connect(port, 'first')
+        second = await connect(port, 'second')
+        start = time.monotonic()
+        results = await asyncio.gather(play(*first, 'nonsense'), play(*second, '0 0'))
+        await server.close()
+        return results, time.monotonic() - start
+
+    results, elapsed = asyncio.run(main())
+    assert results == ['WINNER second timeout'] * 2
+    assert elapsed < 1.5
+
+
+def test_close_sends_lobby_clients_away():
+    async def main():
+        server = GameServer(4, 4, {'A': 2}, turn_timeout=5)
+        port = (await server.start('127.0.0.1', 0)).sockets[0].getsockname()[1]
+        reader, writer = await connect(port, 'alone')
+        assert await reader.readline() == b'WAIT\n'
+        await server.close()
+        line = await asyncio.wait_for(reader.readline(), 1)
+        writer.close()
+        return line, server.lobby
+
+    line, lobby = asyncio.run(main())
+    assert line == b'' and not lobby